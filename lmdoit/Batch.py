@@ -0,0 +1,217 @@
+import concurrent.futures
+import contextlib
+import json
+import queue
+import time
+import typing
+
+from .LMDOIT import LMDOIT
+from .Store import LMDOIT_Store
+
+
+def _raise_error(session, response, error):
+    raise error
+
+
+class LMDOIT_Batch:
+    """
+    The LMDOIT Batch Interface
+
+    This class will run many requests described as plain dicts :
+    -   `url`, `method` (defaults to "GET"), `params` and `headers`,
+    -   `output`, the file in which the body is streamed,
+    -   `extract`, an optionnal extraction step (`regex`, `css_selector`,
+        `json_scripts` or `json`),
+    -   `id`, an optionnal identifier repeated in the result.
+
+    Jobs without an `extract` step are streamed to their `output` without
+    ever building a parse tree, so `bs4` is not even imported for them.
+    """
+
+    def __init__(self, concurrency: int = 8, store: LMDOIT_Store | None = None) -> None:
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("Invalid value for 'concurrency'.")
+
+        if store is not None and not isinstance(store, LMDOIT_Store):
+            raise ValueError("Invalid type for 'store'.")
+
+        self._concurrency = concurrency
+        self._store = store
+        self._apis = queue.SimpleQueue()
+
+    @contextlib.contextmanager
+    def _api(self) -> typing.Generator[LMDOIT, typing.Any, typing.Any]:
+        # `requests.Session` is not thread-safe, each running job owns one.
+        # The sessions outlive the threads of `run`, so their pooled
+        # connections are reused by the next calls.
+        try:
+            api = self._apis.get_nowait()
+        except queue.Empty:
+            api = LMDOIT()
+        try:
+            yield api
+        finally:
+            self._apis.put(api)
+
+    def _extract(self, response, extract: dict) -> dict:
+        extracted = {}
+
+        if "regex" in extract:
+            extracted["regex"] = response.match_regex(regex=extract["regex"])
+
+        if "css_selector" in extract:
+            extracted["css_selector"] = [
+                tag.get_text()
+                for tag in response.find_html_element(
+                    css_selector=extract["css_selector"], return_all_found=True
+                )
+            ]
+
+        if extract.get("json_scripts", False):
+            extracted["json_scripts"] = list(
+                response.find_json_objects_from_script_elements()
+            )
+
+        if extract.get("json", False):
+            extracted["json"] = response.to_json()
+
+        return extracted
+
+    def run_job(self, job: dict) -> dict:
+        """
+        Run one job and describe how it went. Errors are never raised, they
+        are reported in the `error` field of the result.
+
+        :param job: The job to run.
+        :type job: `dict`
+        :return: The result (`id`, `url`, `ok`, `status_code`, `output`,
+        `elapsed`, `error`, and `skipped` or `extracted` when relevant).
+        :rtype: `dict`
+        """
+
+        if not isinstance(job, dict):
+            job = {"error": "Invalid type for 'job'."}
+
+        result = {
+            "id": job.get("id", None),
+            "url": job.get("url", None),
+            "ok": False,
+            "status_code": None,
+            "output": job.get("output", None),
+            "elapsed": 0.0,
+            "error": job.get("error", None),
+        }
+        if result["error"] is not None:
+            return result
+
+        started = time.perf_counter()
+        try:
+            with self._api() as api:
+                self._run_job(api=api, job=job, result=result)
+            result["ok"] = True
+        except Exception as error:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+            if status_code is not None:
+                result["status_code"] = status_code
+            result["error"] = f"{type(error).__name__}: {error}"
+
+        result["elapsed"] = time.perf_counter() - started
+        return result
+
+    def _run_job(self, api: LMDOIT, job: dict, result: dict) -> None:
+        request = (
+            api.no_auth(url=job["url"], method=job.get("method", "GET"))
+            .set_url_params(params=job.get("params", {}))
+            .set_custom_headers(headers=job.get("headers", {}))
+        )
+        extract = job.get("extract", None)
+
+        if extract is None and self._store is not None and "output" in job:
+            downloaded, response = request._download_to_store(
+                store=self._store,
+                output_dest=job["output"],
+                skip_if_up_to_date=True,
+            )
+            result["status_code"] = response.status_code
+            result["skipped"] = not downloaded
+        elif extract is None and "output" in job:
+            result["status_code"] = request.download(output_dest=job["output"]).status_code
+        else:
+            with request.get_response() as response:
+                result["status_code"] = response._response.status_code
+                response.handle_error(on_error_callback=_raise_error)
+
+                if "output" in job:
+                    response.save_response_for_debug(output_dest=job["output"])
+
+                if extract is not None:
+                    result["extracted"] = self._extract(
+                        response=response, extract=extract
+                    )
+
+    def run(
+        self, jobs: typing.Iterable[dict]
+    ) -> typing.Generator[dict, typing.Any, typing.Any]:
+        """
+        Run all `jobs` concurrently and yield their results as soon as they
+        are done. Jobs are consumed lazily, so `jobs` may be a generator over
+        a file of any size.
+
+        :param jobs: The jobs to run.
+        :type jobs: `typing.Iterable[dict]`
+        :return: The results, in completion order.
+        :rtype: `typing.Generator[dict, typing.Any, typing.Any]`
+        """
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._concurrency
+        ) as executor:
+            pending = set()
+
+            for job in jobs:
+                if len(pending) >= self._concurrency * 2:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(self.run_job, job))
+
+            for future in concurrent.futures.as_completed(pending):
+                yield future.result()
+
+    def run_file(
+        self, jobs_stream: typing.TextIO, results_stream: typing.TextIO
+    ) -> dict:
+        """
+        Run the JSONL `jobs_stream` and write one JSON result per line into
+        `results_stream`. Jobs without `id` are identified by their line
+        number.
+
+        :param jobs_stream: The JSONL jobs, one per line.
+        :param results_stream: The stream in which results are written.
+        :type jobs_stream: `typing.TextIO`
+        :type results_stream: `typing.TextIO`
+        :return: The count of `succeeded` and `failed` jobs.
+        :rtype: `dict`
+        """
+
+        def read_jobs():
+            for line_number, line in enumerate(jobs_stream, start=1):
+                if len(line.strip()) == 0:
+                    continue
+                try:
+                    job = json.loads(line)
+                except json.decoder.JSONDecodeError as error:
+                    job = {"error": f"JSONDecodeError: {error}"}
+                if not isinstance(job, dict):
+                    job = {"error": "Invalid type for 'job'."}
+                job.setdefault("id", line_number)
+                yield job
+
+        summary = {"succeeded": 0, "failed": 0}
+        for result in self.run(jobs=read_jobs()):
+            summary["succeeded" if result["ok"] else "failed"] += 1
+            results_stream.write(json.dumps(result) + "\n")
+            results_stream.flush()
+        return summary
@@ -0,0 +1,158 @@
+import codecs
+import re
+import threading
+
+import requests.compat
+
+_META_REGEX = re.compile(
+    rb"""<meta[^>]*?charset\s*=\s*["']?\s*([a-zA-Z0-9_.:\-]+)""",
+    flags=re.IGNORECASE,
+)
+
+# Longest first, the UTF-32 LE BOM starts with the UTF-16 LE one.
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def _lookup(charset: str | bytes | None) -> str | None:
+    if isinstance(charset, bytes):
+        charset = charset.decode("ascii", errors="ignore")
+    if not isinstance(charset, str):
+        return None
+
+    try:
+        return codecs.lookup(charset.strip()).name
+    except LookupError:
+        return None
+
+
+def _is_utf8(content: bytes) -> bool:
+    # Non-ASCII bytes decoding as UTF-8 are very unlikely to be anything else.
+    # The prefix may end in the middle of a character.
+    if content.isascii():
+        return False
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(content, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class LMDOIT_Charset_Resolver:
+    """
+    The LMDOIT Charset Resolver Interface
+
+    This class will find the encoding of a body by looking, in order, at :
+    -   the `charset` of the `Content-Type` header,
+    -   the byte order mark,
+    -   a `<meta charset>` in the first `sniff_bytes` bytes (UTF-16 and UTF-32
+        are read as UTF-8, as the page was decoded enough to find it),
+    -   the `application/json` type, always UTF-8,
+    -   the first `detect_bytes` bytes, when they are valid UTF-8,
+    -   the `<meta charset>` last found for the same host, for HTML bodies,
+    -   statistical detection over the first `detect_bytes` bytes only.
+
+    Only the encodings found by a `<meta charset>` are remembered by host,
+    detection over a short sample is too unreliable to be reused.
+    """
+
+    def __init__(
+        self, sniff_bytes: int = 4096, detect_bytes: int = 64 * 1024
+    ) -> None:
+        if not isinstance(sniff_bytes, int) or sniff_bytes < 1:
+            raise ValueError("Invalid value for 'sniff_bytes'.")
+
+        if not isinstance(detect_bytes, int) or detect_bytes < 1:
+            raise ValueError("Invalid value for 'detect_bytes'.")
+
+        self.sniff_bytes = sniff_bytes
+        self.detect_bytes = detect_bytes
+
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def from_headers(self, content_type: str | None) -> str | None:
+        """
+        Return the encoding declared by the `Content-Type` header, if any.
+
+        :param content_type: The `Content-Type` header.
+        :type content_type: `str` | `None`
+        :rtype: `str` | `None`
+        """
+
+        if not isinstance(content_type, str):
+            return None
+
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "charset":
+                return _lookup(value.strip().strip("'\""))
+        return None
+
+    def resolve(
+        self, content_type: str | None, content: bytes, host: str | None = None
+    ) -> str:
+        """
+        Find the encoding of `content`. Only its first bytes are looked at.
+
+        :param content_type: The `Content-Type` header.
+        :param content: The body, or at least its first bytes.
+        :param host: (optionnal) The host which served the body.
+        :type content_type: `str` | `None`
+        :type content: `bytes`
+        :type host: `str` | `None`
+        :return: The name of the encoding.
+        :rtype: `str`
+        """
+
+        if not isinstance(content, bytes):
+            raise ValueError("Invalid type for 'content'.")
+
+        encoding = self.from_headers(content_type=content_type)
+        if encoding is not None:
+            return encoding
+
+        for bom, encoding in _BOMS:
+            if content.startswith(bom):
+                return encoding
+
+        match = _META_REGEX.search(content, 0, self.sniff_bytes)
+        encoding = None if match is None else _lookup(match.group(1))
+        if encoding is not None:
+            if encoding.startswith(("utf-16", "utf-32")):
+                encoding = "utf-8"
+            if host is not None:
+                with self._lock:
+                    self._hosts[host] = encoding
+            return encoding
+
+        media_type = (
+            None
+            if not isinstance(content_type, str)
+            else content_type.split(";", 1)[0].strip().lower()
+        )
+        if media_type == "application/json":
+            return "utf-8"
+
+        if _is_utf8(content=content[: self.detect_bytes]):
+            return "utf-8"
+
+        if media_type in [None, "text/html", "application/xhtml+xml"]:
+            with self._lock:
+                encoding = self._hosts.get(host, None)
+            if encoding is not None:
+                return encoding
+
+        if requests.compat.chardet is not None:
+            detected = requests.compat.chardet.detect(content[: self.detect_bytes])
+            encoding = _lookup(detected["encoding"])
+
+        # A pure ASCII prefix says nothing about the rest of the body.
+        if encoding is None or encoding == "ascii":
+            encoding = "utf-8"
+        return encoding
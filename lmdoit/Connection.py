@@ -0,0 +1,258 @@
+import socket
+import threading
+import time
+
+import requests
+import requests.adapters
+import urllib3.connection
+import urllib3.connectionpool
+
+
+class LMDOIT_DNS_Cache:
+    """
+    The LMDOIT DNS Cache Interface
+
+    This class will remember host name resolutions for `ttl` seconds, so
+    opening many connections to the same hosts only costs one lookup each.
+
+    The system resolver does not expose record TTLs, `ttl` is therefore the
+    maximum time the addresses are kept. Every address of a host is kept, an
+    address which accepted a connection is tried first afterwards, and the
+    host is forgotten as soon as none of them accepts one.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        if not isinstance(ttl, (int, float)) or ttl < 0:
+            raise ValueError("Invalid value for 'ttl'.")
+
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, host: str, port: int) -> list[str]:
+        addresses = []
+        for *_, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        return addresses
+
+    def resolve(self, host: str, port: int) -> list[str]:
+        """
+        Resolve `host` to its IP addresses.
+
+        :param host: The host name to resolve.
+        :param port: The port which will be connected to.
+        :type host: `str`
+        :type port: `int`
+        :return: The addresses returned by the system resolver, in the order
+        they should be tried.
+        :rtype: `list[str]`
+        """
+
+        if not isinstance(host, str):
+            raise ValueError("Invalid type for 'host'.")
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((host, port), None)
+            if entry is not None and entry[1] > now:
+                self._hits += 1
+                return list(entry[0])
+            self._misses += 1
+
+        addresses = self._lookup(host=host, port=port)
+        with self._lock:
+            self._entries[(host, port)] = (addresses, now + self._ttl)
+        return list(addresses)
+
+    def _prefer(self, host: str, port: int, address: str) -> None:
+        # Move `address` first, so the next connections do not wait on the
+        # unreachable ones before it.
+        with self._lock:
+            entry = self._entries.get((host, port), None)
+            if entry is not None and entry[0][0] != address and address in entry[0]:
+                addresses = [address] + [a for a in entry[0] if a != address]
+                self._entries[(host, port)] = (addresses, entry[1])
+
+    def forget(self, host: str, port: int) -> None:
+        """
+        Drop the cached addresses of `host`.
+        """
+
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def stats(self) -> dict:
+        """
+        :return: The count of cache `hits` and `misses`.
+        :rtype: `dict`
+        """
+
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses}
+
+
+class LMDOIT_HTTP_Adapter(requests.adapters.HTTPAdapter):
+    """
+    The LMDOIT HTTP Adapter Interface
+
+    This class will resolve hosts through a :class:`LMDOIT_DNS_Cache`, open
+    pooled connections ahead of time with :meth:`prewarm`, and count how
+    often requests reuse a pooled connection.
+    """
+
+    def __init__(self, dns_cache: LMDOIT_DNS_Cache, **kwargs) -> None:
+        if not isinstance(dns_cache, LMDOIT_DNS_Cache):
+            raise ValueError("Invalid type for 'dns_cache'.")
+
+        self._dns_cache = dns_cache
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._requests = 0
+        self._opened = 0
+        self._prewarmed = 0
+
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+
+        adapter = self
+
+        class _HTTPConnection(urllib3.connection.HTTPConnection):
+            def _new_conn(self):
+                return adapter._open(connection=self, new_conn=super()._new_conn)
+
+        class _HTTPSConnection(urllib3.connection.HTTPSConnection):
+            def _new_conn(self):
+                return adapter._open(connection=self, new_conn=super()._new_conn)
+
+        class _HTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+            ConnectionCls = _HTTPConnection
+
+        class _HTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+            ConnectionCls = _HTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _HTTPConnectionPool,
+            "https": _HTTPSConnectionPool,
+        }
+
+    def _open(self, connection, new_conn) -> socket.socket:
+        # Like `urllib3.util.connection.create_connection`, each address is
+        # tried in turn until one accepts the connection.
+        host, port = connection._dns_host, connection.port
+        addresses = self._dns_cache.resolve(host=host, port=port)
+        sock = None
+        try:
+            for i, address in enumerate(addresses):
+                connection._dns_host = address
+                try:
+                    sock = new_conn()
+                    break
+                except Exception:
+                    if i == len(addresses) - 1:
+                        self._dns_cache.forget(host=host, port=port)
+                        raise
+        finally:
+            connection._dns_host = host
+
+        if sock is None:
+            raise OSError(f"'{host}' has no address.")
+        if address != addresses[0]:
+            self._dns_cache._prefer(host=host, port=port, address=address)
+
+        with self._lock:
+            if getattr(self._local, "prewarming", False):
+                self._prewarmed += 1
+            else:
+                self._opened += 1
+        return sock
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        with self._lock:
+            self._requests += 1
+        return super().send(request, **kwargs)
+
+    def prewarm(
+        self,
+        url: str,
+        connections: int,
+        verify: bool | str = True,
+        cert: str | tuple | None = None,
+        proxies: dict | None = None,
+    ) -> int:
+        """
+        Open `connections` connections to the host of `url` (TLS handshake
+        included) and leave them in the pool used by later requests.
+
+        :param url: The URL of the host to connect to.
+        :param connections: The count of connections to keep ready, at most
+        the `pool_maxsize` of the adapter.
+        :param verify: The TLS verification setting of the session.
+        :param cert: The client certificate of the session.
+        :param proxies: The proxies of the session.
+        :type url: `str`
+        :type connections: `int`
+        :type verify: `bool` | `str`
+        :type cert: `str` | `tuple` | `None`
+        :type proxies: `dict` | `None`
+        :return: The count of connections opened.
+        :rtype: `int`
+        """
+
+        if not isinstance(connections, int) or connections < 1:
+            raise ValueError("Invalid value for 'connections'.")
+
+        # Pools are keyed by their size, resizing them here would orphan the
+        # ones already prewarmed. They are sized once, by `pool_maxsize`.
+        if connections > self._pool_maxsize:
+            raise ValueError(
+                "Invalid value for 'connections', it exceeds 'pool_maxsize'."
+            )
+
+        request = requests.Request(method="GET", url=url).prepare()
+        if hasattr(self, "get_connection_with_tls_context"):
+            pool = self.get_connection_with_tls_context(
+                request=request, verify=verify, proxies=proxies, cert=cert
+            )
+        else:
+            pool = self.get_connection(url=request.url, proxies=proxies)
+
+        held = []
+        opened = 0
+        self._local.prewarming = True
+        try:
+            for _ in range(connections):
+                connection = pool._get_conn()
+                held.append(connection)
+                if connection.sock is None:
+                    connection.connect()
+                    opened += 1
+        finally:
+            self._local.prewarming = False
+            for connection in held:
+                pool._put_conn(connection)
+        return opened
+
+    def stats(self) -> dict:
+        """
+        :return: The count of `requests` sent, connections `opened` while
+        sending them and `prewarmed` beforehand, and the `reuse_ratio` of
+        requests which did not open a connection.
+        :rtype: `dict`
+        """
+
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "opened": self._opened,
+                "prewarmed": self._prewarmed,
+                "reuse_ratio": (
+                    None
+                    if self._requests == 0
+                    else max(0.0, 1 - self._opened / self._requests)
+                ),
+            }
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import pathlib
+import sqlite3
+import time
+import typing
+
+from .Request import LMDOIT_Request_Process
+from .Response import LMDOIT_Response
+
+Extractor = typing.Callable[[LMDOIT_Response], typing.Any]
+
+# Headers set to `None` are dropped by `requests`, even the caller's ones.
+_UNCONDITIONAL_HEADERS = {"If-None-Match": None, "If-Modified-Since": None}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extractions (
+    digest TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (digest, extractor, version)
+);
+"""
+
+
+class LMDOIT_Fingerprint_Store:
+    """
+    The LMDOIT Fingerprint Store Interface
+
+    This class will remember, in a SQLite database, the digest of the body
+    served by each URL and the results extracted from each body :
+    -   a page whose body did not change is never parsed again, the stored
+        results are returned instead,
+    -   results are keyed by extractor identity and version, bumping the
+        version of an extractor runs it again,
+    -   the `ETag` / `Last-Modified` headers are sent back, so unchanged pages
+        may not even be downloaded.
+
+    Results must be JSON serializable, generators are turned into lists.
+    Each process (or thread) must use its own instance.
+    """
+
+    def __init__(self, path: str | pathlib.Path) -> None:
+        if not isinstance(path, (str, pathlib.Path)):
+            raise ValueError("Invalid type for 'path'.")
+
+        self._db = sqlite3.connect(database=path, timeout=60)
+        self._db.executescript(_SCHEMA)
+        self.begin_run()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def begin_run(self):
+        """
+        Reset the statistics returned by :meth:`stats`.
+        """
+
+        self._stats = {
+            "new": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "not_modified": 0,
+            "extracted": 0,
+            "reused": 0,
+        }
+        return self
+
+    def stats(self) -> dict:
+        """
+        Describe the run since the last :meth:`begin_run`.
+
+        :return: The count of `new`, `changed` and `unchanged` pages, of
+        `not_modified` answers (unchanged pages not downloaded again), and of
+        results `extracted` or `reused` from the store.
+        :rtype: `dict`
+        """
+        return dict(self._stats)
+
+    def extract(
+        self,
+        request: LMDOIT_Request_Process,
+        extractor: Extractor,
+        extractor_id: str | None = None,
+        version: str = "1",
+    ) -> typing.Any:
+        """
+        Send `request` and return what `extractor` finds in its response. When
+        the body was already seen, the stored results are returned without
+        building a :class:`LMDOIT_Response`.
+
+        :param request: The request to send.
+        :param extractor: The function extracting data from the response.
+        :param extractor_id: (optionnal) The identity of the extractor,
+        defaults to its qualified name. It is required for lambdas, nested
+        functions and callables without a qualified name, as their names are
+        not unique.
+        :param version: The version of the extractor.
+        :type request: :class:`LMDOIT_Request_Process`
+        :type extractor: `typing.Callable[[LMDOIT_Response], typing.Any]`
+        :type extractor_id: `str` | `None`
+        :type version: `str`
+        :return: The extracted results.
+        :rtype: `typing.Any`
+        """
+
+        if not isinstance(request, LMDOIT_Request_Process):
+            raise ValueError("Invalid type for 'request'.")
+
+        if not callable(extractor):
+            raise ValueError("Invalid type for 'extractor'.")
+
+        if extractor_id is None:
+            qualname = getattr(extractor, "__qualname__", None)
+            if (
+                not isinstance(qualname, str)
+                or "<lambda>" in qualname
+                or "<locals>" in qualname
+            ):
+                raise ValueError("An 'extractor_id' is required for this 'extractor'.")
+            extractor_id = f"{extractor.__module__}.{qualname}"
+
+        if not isinstance(extractor_id, str) or not isinstance(version, str):
+            raise ValueError("Invalid type for 'extractor_id' or 'version'.")
+
+        url = request._prepared_url()
+        page = self._db.execute(
+            "SELECT digest, etag, last_modified FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+
+        conditional_headers = {}
+        if page is not None and page[1] is not None:
+            conditional_headers["If-None-Match"] = page[1]
+        if page is not None and page[2] is not None:
+            conditional_headers["If-Modified-Since"] = page[2]
+
+        response = request._send(extra_headers=conditional_headers)
+        if page is None and response.status_code == 304:
+            # Answering the caller's own conditional headers, nothing to hash.
+            response = request._send(extra_headers=_UNCONDITIONAL_HEADERS)
+
+        if page is not None and response.status_code == 304:
+            self._stats["not_modified"] += 1
+            digest, etag, last_modified = page
+        else:
+            response.raise_for_status()
+            digest = hashlib.blake2b(response.content).hexdigest()
+            etag = response.headers.get("ETag", None)
+            last_modified = response.headers.get("Last-Modified", None)
+
+        if page is None:
+            self._stats["new"] += 1
+        elif page[0] == digest:
+            self._stats["unchanged"] += 1
+        else:
+            self._stats["changed"] += 1
+
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (url, digest, etag, last_modified, time.time()),
+            )
+
+        stored = self._db.execute(
+            "SELECT result FROM extractions"
+            " WHERE digest = ? AND extractor = ? AND version = ?",
+            (digest, extractor_id, version),
+        ).fetchone()
+        if stored is not None:
+            response.close()
+            self._stats["reused"] += 1
+            return json.loads(stored[0])
+
+        if response.status_code == 304:
+            # No results stored for this extractor (or version), the body is
+            # needed again.
+            response = request._send(extra_headers=_UNCONDITIONAL_HEADERS)
+            response.raise_for_status()
+            digest = hashlib.blake2b(response.content).hexdigest()
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        digest,
+                        response.headers.get("ETag", None),
+                        response.headers.get("Last-Modified", None),
+                        time.time(),
+                    ),
+                )
+
+        with LMDOIT_Response(session=request._session, response=response) as wrapped:
+            result = extractor(wrapped)
+            if isinstance(result, typing.Iterator):
+                result = list(result)
+        self._stats["extracted"] += 1
+
+        # Fresh results go through JSON too, so they look the same as the
+        # stored ones of the next runs.
+        encoded = json.dumps(result)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (digest, extractor_id, version, encoded),
+            )
+        return json.loads(encoded)
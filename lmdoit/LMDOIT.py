@@ -2,6 +2,8 @@ import requests
 import requests.cookies
 
 from .Auth import LMDOIT_Auth_Process
+from .Connection import LMDOIT_DNS_Cache, LMDOIT_HTTP_Adapter
+from .Proxy import LMDOIT_Proxy_Pool, _LMDOIT_Proxy_Session
 from .Request import LMDOIT_Request_Process
 
 
@@ -16,8 +18,38 @@ class LMDOIT:
     -   ...
     """
 
-    def __init__(self) -> None:
+    # Shared by all instances of the process unless one is given.
+    dns_cache = LMDOIT_DNS_Cache(ttl=300.0)
+
+    def __init__(
+        self,
+        dns_cache: LMDOIT_DNS_Cache | None = None,
+        proxy_pool: LMDOIT_Proxy_Pool | None = None,
+        pool_maxsize: int = 10,
+    ) -> None:
+        if dns_cache is None:
+            dns_cache = self.dns_cache
+
+        if not isinstance(pool_maxsize, int) or pool_maxsize < 1:
+            raise ValueError("Invalid value for 'pool_maxsize'.")
+
+        if proxy_pool is not None and not isinstance(proxy_pool, LMDOIT_Proxy_Pool):
+            raise ValueError("Invalid type for 'proxy_pool'.")
+
+        # With a proxy pool, requests are sent through the sessions of the
+        # proxies, this one only holds the authentication cookies. Targets
+        # are resolved and connected to by the proxies, not from here.
+        if proxy_pool is not None:
+            self._session = _LMDOIT_Proxy_Session(proxy_pool=proxy_pool)
+            self._adapter = None
+            return
+
         self._session = requests.Session()
+        self._adapter = LMDOIT_HTTP_Adapter(
+            dns_cache=dns_cache, pool_maxsize=pool_maxsize
+        )
+        self._session.mount(prefix="http://", adapter=self._adapter)
+        self._session.mount(prefix="https://", adapter=self._adapter)
 
     def auth(self, url: str, method: str) -> LMDOIT_Auth_Process:
         """
@@ -64,3 +96,76 @@ class LMDOIT:
             raise ValueError("You must supply both 'url' and 'method' parameters.")
 
         return LMDOIT_Request_Process(session=self._session, url=url, method=method)
+
+    def prewarm(self, hosts: list[str], connections_per_host: int = 1) -> int:
+        """
+        Open pooled connections to `hosts` before the requests are sent, so
+        the DNS lookups and TLS handshakes are already done.
+
+        :param hosts: The hosts, as host names ("https" is assumed) or URLs.
+        :param connections_per_host: The count of connections to keep ready
+        for each host, at most the `pool_maxsize` given to :class:`LMDOIT`.
+        :type hosts: `list[str]`
+        :type connections_per_host: `int`
+        :return: The count of connections opened.
+        :rtype: `int`
+
+        :Example:
+        >>> prewarm(
+        >>>     hosts=["www.example.com", "http://cdn.example.com:8080"],
+        >>>     connections_per_host=4
+        >>> )
+        """
+
+        if self._adapter is None:
+            raise ValueError("Connections can not be prewarmed through a proxy pool.")
+
+        if not isinstance(hosts, (list, tuple, set)):
+            raise ValueError("Invalid type for 'hosts'.")
+
+        if not isinstance(connections_per_host, int) or connections_per_host < 1:
+            raise ValueError("Invalid value for 'connections_per_host'.")
+
+        opened = 0
+        for host in hosts:
+            if not isinstance(host, str):
+                raise ValueError("Invalid type for 'hosts'.")
+
+            url = host if "://" in host else f"https://{host}"
+            # The pool is only shared with requests using the same settings,
+            # environment ones (CA bundle, proxies) included.
+            settings = self._session.merge_environment_settings(
+                url=url, proxies={}, stream=None, verify=None, cert=None
+            )
+            opened += self._adapter.prewarm(
+                url=url,
+                connections=connections_per_host,
+                verify=settings["verify"],
+                cert=settings["cert"],
+                proxies=settings["proxies"],
+            )
+        return opened
+
+    def connection_stats(self) -> dict:
+        """
+        Report how well connections are reused.
+
+        :return: The count of `requests` sent, connections `opened` while
+        sending them and `prewarmed` beforehand, the `reuse_ratio` of requests
+        which did not open a connection, and the DNS cache `dns_hits` and
+        `dns_misses`.
+        :rtype: `dict`
+        """
+
+        if self._adapter is None:
+            raise ValueError(
+                "Connections are not tracked through a proxy pool,"
+                " see 'LMDOIT_Proxy_Pool.stats'."
+            )
+
+        dns_stats = self._adapter._dns_cache.stats()
+        return {
+            **self._adapter.stats(),
+            "dns_hits": dns_stats["hits"],
+            "dns_misses": dns_stats["misses"],
+        }
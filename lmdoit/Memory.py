@@ -0,0 +1,117 @@
+import collections
+import threading
+import weakref
+
+
+class LMDOIT_Memory_Budget:
+    """
+    The LMDOIT Memory Budget Interface
+
+    This class will bound the memory used by cached parse trees :
+    -   owners register the estimated cost of the tree they keep,
+    -   every use of a tree marks it as the most recently used,
+    -   when the budget is exceeded, the least recently used trees are evicted.
+
+    An owner must provide an `_evict()` method dropping its tree, which will
+    be rebuilt on its next use.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self._lock = threading.RLock()
+        self._entries = collections.OrderedDict()
+        self._used_bytes = 0
+        self._max_bytes = None
+
+        self.set_max_bytes(max_bytes=max_bytes)
+
+    @property
+    def used_bytes(self) -> int:
+        """
+        The estimated memory, in bytes, held by the tracked trees.
+        """
+        return self._used_bytes
+
+    @property
+    def max_bytes(self) -> int | None:
+        """
+        The budget in bytes, `None` when unbounded.
+        """
+        return self._max_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_max_bytes(self, max_bytes: int | None):
+        """
+        Change the budget, evicting trees right away if it is exceeded.
+
+        :param max_bytes: The budget in bytes, `None` to disable it.
+        :type max_bytes: `int` | `None`
+        """
+
+        if max_bytes is not None and (
+            not isinstance(max_bytes, int) or max_bytes < 0
+        ):
+            raise ValueError("Invalid value for 'max_bytes'.")
+
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict_over_budget()
+        return self
+
+    def track(self, owner, cost: int):
+        """
+        Register that `owner` keeps a tree of `cost` bytes.
+
+        :param owner: The object keeping the tree, it must be weakly
+        referenceable and provide an `_evict()` method.
+        :param cost: The estimated size of the tree in bytes.
+        :type cost: `int`
+        """
+
+        if not isinstance(cost, int) or cost < 0:
+            raise ValueError("Invalid value for 'cost'.")
+
+        key = id(owner)
+        with self._lock:
+            self.forget(owner=owner)
+            self._entries[key] = (
+                weakref.ref(owner, lambda _, key=key: self._discard(key)),
+                cost,
+            )
+            self._used_bytes += cost
+            self._evict_over_budget()
+        return self
+
+    def touch(self, owner):
+        """
+        Mark the tree of `owner` as the most recently used.
+        """
+
+        with self._lock:
+            if id(owner) in self._entries:
+                self._entries.move_to_end(id(owner))
+        return self
+
+    def forget(self, owner):
+        """
+        Stop tracking the tree of `owner`, without evicting it.
+        """
+
+        self._discard(id(owner))
+        return self
+
+    def _discard(self, key: int):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._used_bytes -= entry[1]
+
+    def _evict_over_budget(self):
+        while self._max_bytes is not None and self._used_bytes > self._max_bytes:
+            key, (ref, cost) = next(iter(self._entries.items()))
+            self._discard(key)
+
+            owner = ref()
+            if owner is not None:
+                owner._evict()
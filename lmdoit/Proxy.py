@@ -0,0 +1,315 @@
+import threading
+import time
+
+import requests
+import requests.cookies
+
+
+class _LMDOIT_Proxy:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+        # Each proxy has its own cookie jar (which is thread-safe) and
+        # connection pools.
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self._local = threading.local()
+
+        self.in_flight = 0
+        self.health = 1.0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = None
+        self.requests = 0
+
+    @property
+    def session(self) -> requests.Session:
+        # `requests.Session` is not thread-safe, each thread owns its own.
+        if getattr(self._local, "session", None) is None:
+            session = requests.Session()
+            session.proxies = {"http": self.url, "https": self.url}
+            session.trust_env = False
+            session.cookies = self.cookies
+            self._local.session = session
+        return self._local.session
+
+    def score(self) -> float:
+        # Lower is better, untried proxies come first.
+        return (self.latency or 0.0) * (1 + self.in_flight) / max(self.health, 0.01)
+
+
+class LMDOIT_Proxy_Pool:
+    """
+    The LMDOIT Proxy Pool Interface
+
+    This class will spread requests over many proxies :
+    -   each request goes to the available proxy with the best score, built
+        from its health and its latency (exponentially weighted average),
+    -   a proxy never handles more than `max_concurrency_per_proxy` requests
+        at once, further requests wait for a free proxy,
+    -   a proxy failing `max_failures` times in a row is ejected for
+        `ejection_seconds`, then it is given a single trial request (or
+        re-probed with :meth:`probe`) before being used again,
+    -   each proxy keeps its own connection pools and cookie jar.
+
+    Connection errors and `failure_statuses` answers count as failures,
+    requests failing on connection errors are retried on another proxy.
+
+    A request sent with `stream=True` keeps its proxy until its body is
+    consumed or the response is closed, so streamed responses must always
+    be closed (or used as context managers).
+    """
+
+    def __init__(
+        self,
+        proxies: list[str],
+        max_concurrency_per_proxy: int = 4,
+        max_failures: int = 3,
+        ejection_seconds: float = 30.0,
+        latency_alpha: float = 0.3,
+        max_retries: int = 2,
+        failure_statuses: frozenset[int] = frozenset({407, 429, 502, 503, 504}),
+    ) -> None:
+        if not isinstance(proxies, (list, tuple)) or len(proxies) == 0:
+            raise ValueError("Invalid value for 'proxies'.")
+
+        if not all([isinstance(p, str) for p in proxies]):
+            raise ValueError("Invalid type for 'proxies'.")
+
+        if not isinstance(max_concurrency_per_proxy, int) or max_concurrency_per_proxy < 1:
+            raise ValueError("Invalid value for 'max_concurrency_per_proxy'.")
+
+        if not isinstance(max_failures, int) or max_failures < 1:
+            raise ValueError("Invalid value for 'max_failures'.")
+
+        if not isinstance(latency_alpha, (int, float)) or not 0 < latency_alpha <= 1:
+            raise ValueError("Invalid value for 'latency_alpha'.")
+
+        if not isinstance(max_retries, int) or max_retries < 0:
+            raise ValueError("Invalid value for 'max_retries'.")
+
+        if not isinstance(failure_statuses, (set, frozenset)):
+            raise ValueError("Invalid type for 'failure_statuses'.")
+
+        self._proxies = [_LMDOIT_Proxy(url=url) for url in proxies]
+        self._max_concurrency = max_concurrency_per_proxy
+        self._max_failures = max_failures
+        self._ejection_seconds = ejection_seconds
+        self._alpha = latency_alpha
+        self._max_retries = max_retries
+        self._failure_statuses = frozenset(failure_statuses)
+
+        self._condition = threading.Condition()
+
+    def _is_available(self, proxy: _LMDOIT_Proxy, now: float) -> bool:
+        if proxy.ejected_until is None:
+            return proxy.in_flight < self._max_concurrency
+        # Once its ejection is over, a proxy gets one trial request at a time.
+        return proxy.ejected_until <= now and proxy.in_flight == 0
+
+    def acquire(
+        self, timeout: float | None = None, exclude: set[str] | None = None
+    ) -> _LMDOIT_Proxy:
+        """
+        Reserve the best available proxy, waiting for one if needed.
+
+        :param timeout: (optionnal) The maximum time to wait, in seconds.
+        :param exclude: (optionnal) The URLs of the proxies not to use.
+        :type timeout: `float` | `None`
+        :type exclude: `set[str]` | `None`
+        :return: The reserved proxy, to give back with :meth:`release`.
+        """
+
+        exclude = exclude or set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                candidates = [
+                    p
+                    for p in self._proxies
+                    if p.url not in exclude and self._is_available(proxy=p, now=now)
+                ]
+                if len(candidates) > 0:
+                    proxy = min(candidates, key=lambda p: p.score())
+                    proxy.in_flight += 1
+                    return proxy
+
+                # Ejected proxies become available with time, not only when a
+                # request is released.
+                waits = [
+                    p.ejected_until - now
+                    for p in self._proxies
+                    if p.url not in exclude
+                    and p.ejected_until is not None
+                    and p.in_flight == 0
+                ]
+                if deadline is not None:
+                    waits.append(deadline - now)
+                    if deadline <= now:
+                        raise TimeoutError("No proxy is available.")
+                if len(waits) == 0 and len(exclude) >= len(self._proxies):
+                    raise ValueError("Every proxy is excluded.")
+                self._condition.wait(timeout=max(min(waits), 0.001) if waits else None)
+
+    def release(self, proxy: _LMDOIT_Proxy, ok: bool, latency: float | None = None):
+        """
+        Give back a proxy reserved with :meth:`acquire` and record how its
+        request went.
+
+        :param proxy: The reserved proxy.
+        :param ok: Whether the request succeeded.
+        :param latency: (optionnal) The duration of the request, in seconds.
+        :type ok: `bool`
+        :type latency: `float` | `None`
+        """
+
+        with self._condition:
+            proxy.in_flight -= 1
+            proxy.requests += 1
+
+            if ok:
+                proxy.health = proxy.health * (1 - self._alpha) + self._alpha
+                proxy.failures = 0
+                proxy.ejected_until = None
+                if latency is not None:
+                    proxy.latency = (
+                        latency
+                        if proxy.latency is None
+                        else proxy.latency * (1 - self._alpha) + latency * self._alpha
+                    )
+            else:
+                proxy.health = proxy.health * (1 - self._alpha)
+                proxy.failures += 1
+                if proxy.ejected_until is not None or proxy.failures >= self._max_failures:
+                    proxy.ejected_until = time.monotonic() + self._ejection_seconds
+
+            self._condition.notify_all()
+        return self
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the best available proxy, see
+        :meth:`requests.Session.request` for the parameters.
+
+        :rtype: `requests.Response`
+        """
+
+        tried = set()
+        while True:
+            proxy = self.acquire(exclude=tried)
+            started = time.monotonic()
+            try:
+                response = proxy.session.request(method=method, url=url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.release(proxy=proxy, ok=False)
+                tried.add(proxy.url)
+                if len(tried) > self._max_retries or len(tried) >= len(self._proxies):
+                    raise
+                continue
+
+            ok = response.status_code not in self._failure_statuses
+            if kwargs.get("stream", False):
+                self._release_with_body(
+                    proxy=proxy, ok=ok, started=started, response=response
+                )
+            else:
+                self.release(proxy=proxy, ok=ok, latency=time.monotonic() - started)
+            return response
+
+    def _release_with_body(
+        self,
+        proxy: _LMDOIT_Proxy,
+        ok: bool,
+        started: float,
+        response: requests.Response,
+    ) -> None:
+        # urllib3 releases the connection once the body is consumed, and
+        # `requests.Response.close` does it too : the proxy is released along.
+        release_conn = response.raw.release_conn
+        once = threading.Lock()
+
+        def _release_conn():
+            release_conn()
+            if once.acquire(blocking=False):
+                self.release(proxy=proxy, ok=ok, latency=time.monotonic() - started)
+
+        response.raw.release_conn = _release_conn
+
+    def probe(self, url: str, timeout: float = 10.0) -> int:
+        """
+        Send a `GET` request to `url` through each ejected proxy whose
+        ejection is over, reinstating the ones which answer.
+
+        :param url: The URL to request.
+        :param timeout: The timeout of each probe, in seconds.
+        :type url: `str`
+        :type timeout: `float`
+        :return: The count of reinstated proxies.
+        :rtype: `int`
+        """
+
+        reinstated = 0
+        for proxy in self._proxies:
+            with self._condition:
+                if not (
+                    proxy.ejected_until is not None
+                    and self._is_available(proxy=proxy, now=time.monotonic())
+                ):
+                    continue
+                proxy.in_flight += 1
+
+            started = time.monotonic()
+            try:
+                ok = (
+                    proxy.session.get(url=url, timeout=timeout).status_code
+                    not in self._failure_statuses
+                )
+            except requests.exceptions.RequestException:
+                ok = False
+
+            self.release(proxy=proxy, ok=ok, latency=time.monotonic() - started)
+            reinstated += int(ok)
+        return reinstated
+
+    def stats(self) -> list[dict]:
+        """
+        Describe each proxy.
+
+        :return: The `url`, `health`, `latency`, `in_flight`, `requests` and
+        `ejected` state of each proxy.
+        :rtype: `list[dict]`
+        """
+
+        with self._condition:
+            return [
+                {
+                    "url": p.url,
+                    "health": p.health,
+                    "latency": p.latency,
+                    "in_flight": p.in_flight,
+                    "requests": p.requests,
+                    "ejected": p.ejected_until is not None,
+                }
+                for p in self._proxies
+            ]
+
+
+class _LMDOIT_Proxy_Session(requests.Session):
+    # Sends every request through the pool. The cookies of this session (the
+    # authentication ones) are sent along, the cookies set by responses stay
+    # in the jar of the proxy which received them.
+
+    def __init__(self, proxy_pool: LMDOIT_Proxy_Pool) -> None:
+        super().__init__()
+        self._proxy_pool = proxy_pool
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        cookies = requests.cookies.merge_cookies(
+            requests.cookies.RequestsCookieJar(), self.cookies
+        )
+        if kwargs.get("cookies", None) is not None:
+            cookies = requests.cookies.merge_cookies(cookies, kwargs["cookies"])
+        kwargs["cookies"] = cookies
+
+        return self._proxy_pool.request(method=method, url=url, **kwargs)
@@ -0,0 +1,486 @@
+import contextlib
+import json
+import os
+import pathlib
+import socket
+import sqlite3
+import threading
+import time
+import typing
+
+from .Batch import LMDOIT_Batch
+from .Request import LMDOIT_Request_Process
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at REAL NOT NULL,
+    leased_by TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_visible_at ON jobs (visible_at);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    result TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    worker TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+def _job_from_request(request: LMDOIT_Request_Process) -> dict:
+    # The session can not be serialized, only its cookies travel with the job.
+    request = dict(request)
+    headers = dict(request["custom_headers"])
+    cookies = request["session"].cookies.get_dict()
+
+    if len(cookies) > 0 and "Cookie" not in headers:
+        headers["Cookie"] = "; ".join([f"{k}={v}" for k, v in cookies.items()])
+
+    return {
+        "url": request["url"],
+        "method": request["method"],
+        "params": request["params"],
+        "headers": headers,
+    }
+
+
+class LMDOIT_Queue:
+    """
+    The LMDOIT Queue Interface
+
+    This class will hold jobs in a SQLite database shared by many workers :
+    -   claimed jobs are leased for `visibility_timeout` seconds, then become
+        visible again, so the jobs of a crashed worker are reclaimed, the
+        leases of running jobs are extended by :meth:`work`,
+    -   failed jobs are retried until `max_attempts`, then moved to the
+        `dead_letters` table,
+    -   finished jobs are moved to the `results` table.
+
+    Jobs are :class:`LMDOIT_Batch` jobs (see :meth:`LMDOIT_Batch.run_job`).
+
+    Each process (or thread) must use its own instance. WAL mode needs every
+    worker to run on the same host, set `wal` to `False` when the database
+    lives on a network filesystem shared by several machines.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        wal: bool = True,
+    ) -> None:
+        if not isinstance(path, (str, pathlib.Path)):
+            raise ValueError("Invalid type for 'path'.")
+
+        if (
+            not isinstance(visibility_timeout, (int, float))
+            or visibility_timeout <= 0
+        ):
+            raise ValueError("Invalid value for 'visibility_timeout'.")
+
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError("Invalid value for 'max_attempts'.")
+
+        self._path = path
+        self._visibility_timeout = visibility_timeout
+        self._max_attempts = max_attempts
+        self._wal = wal
+
+        self._db = sqlite3.connect(database=path, timeout=60, isolation_level=None)
+        if wal:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # `BEGIN IMMEDIATE` takes the write lock upfront, so two workers can
+        # never claim the same job.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def put(
+        self, job: dict | LMDOIT_Request_Process, output_dest: str | None = None
+    ) -> int:
+        """
+        Add a job to the queue.
+
+        :param job: The job, or a request process to serialize as a job.
+        :param output_dest: (optionnal) The `output` of the job.
+        :type job: `dict` | :class:`LMDOIT_Request_Process`
+        :type output_dest: `str` | `None`
+        :return: The id of the job.
+        :rtype: `int`
+        """
+
+        if isinstance(job, LMDOIT_Request_Process):
+            job = _job_from_request(request=job)
+
+        if not isinstance(job, dict):
+            raise ValueError("Invalid type for 'job'.")
+
+        if output_dest is not None:
+            job = {**job, "output": str(output_dest)}
+
+        return self._db.execute(
+            "INSERT INTO jobs (payload, visible_at) VALUES (?, ?)",
+            (json.dumps(job), time.time()),
+        ).lastrowid
+
+    def put_many(self, jobs: typing.Iterable[dict | LMDOIT_Request_Process]):
+        """
+        Add many jobs to the queue in a single transaction.
+
+        :param jobs: The jobs, or request processes to serialize as jobs.
+        :type jobs: `typing.Iterable[dict | LMDOIT_Request_Process]`
+        """
+
+        with self._transaction():
+            for job in jobs:
+                self.put(job=job)
+        return self
+
+    def claim(self, worker_id: str, batch_size: int = 10) -> list[dict]:
+        """
+        Lease up to `batch_size` visible jobs to `worker_id`. Jobs leased too
+        many times without completing are moved to the dead letters.
+
+        :param worker_id: The identifier of the worker.
+        :param batch_size: The maximum count of jobs to lease.
+        :type worker_id: `str`
+        :type batch_size: `int`
+        :return: The leased jobs, each with its queue `id` and `attempts`.
+        :rtype: `list[dict]`
+        """
+
+        if not isinstance(worker_id, str):
+            raise ValueError("Invalid type for 'worker_id'.")
+
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("Invalid value for 'batch_size'.")
+
+        now = time.time()
+        claimed = []
+        with self._transaction() as db:
+            # Exhausted jobs are buried first, so they never take the place of
+            # claimable ones in the batch.
+            exhausted = db.execute(
+                "SELECT id, last_error FROM jobs"
+                " WHERE visible_at <= ? AND attempts >= ?",
+                (now, self._max_attempts),
+            ).fetchall()
+            for job_id, last_error in exhausted:
+                self._bury(
+                    job_id=job_id,
+                    error=last_error or "The lease expired too many times.",
+                )
+
+            rows = db.execute(
+                "SELECT id, payload, attempts FROM jobs"
+                " WHERE visible_at <= ? ORDER BY visible_at, id LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+
+            for job_id, payload, attempts in rows:
+                db.execute(
+                    "UPDATE jobs SET visible_at = ?, leased_by = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (now + self._visibility_timeout, worker_id, job_id),
+                )
+                claimed.append(
+                    {**json.loads(payload), "id": job_id, "attempts": attempts + 1}
+                )
+        return claimed
+
+    def extend(self, job_ids: list[int], worker_id: str) -> int:
+        """
+        Lease the jobs of `job_ids` owned by `worker_id` for another
+        `visibility_timeout` seconds.
+
+        :param job_ids: The ids of the jobs.
+        :param worker_id: The identifier of the worker owning the leases.
+        :type job_ids: `list[int]`
+        :type worker_id: `str`
+        :return: The count of leases still owned, and extended.
+        :rtype: `int`
+        """
+
+        if not isinstance(worker_id, str):
+            raise ValueError("Invalid type for 'worker_id'.")
+
+        if len(job_ids) == 0:
+            return 0
+
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE jobs SET visible_at = ? WHERE leased_by = ?"
+                f" AND id IN ({', '.join(['?'] * len(job_ids))})",
+                (time.time() + self._visibility_timeout, worker_id, *job_ids),
+            ).rowcount
+
+    def _keep_leases(
+        self,
+        worker_id: str,
+        running: set[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+    ) -> None:
+        # The connection of the queue belongs to the thread of `work`, this
+        # one opens its own.
+        with LMDOIT_Queue(
+            path=self._path,
+            visibility_timeout=self._visibility_timeout,
+            max_attempts=self._max_attempts,
+            wal=self._wal,
+        ) as queue:
+            while not stop.wait(timeout=self._visibility_timeout / 3):
+                with lock:
+                    job_ids = list(running)
+                queue.extend(job_ids=job_ids, worker_id=worker_id)
+
+    def complete(self, job_id: int, worker_id: str, result: dict) -> bool:
+        """
+        Move a leased job to the results.
+
+        :param job_id: The id of the job.
+        :param worker_id: The identifier of the worker owning the lease.
+        :param result: The result of the job.
+        :type job_id: `int`
+        :type worker_id: `str`
+        :type result: `dict`
+        :return: Whether the lease was still owned by `worker_id`.
+        :rtype: `bool`
+        """
+
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT payload, attempts FROM jobs WHERE id = ? AND leased_by = ?",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                return False
+
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, row[0], json.dumps(result), row[1], worker_id, time.time()),
+            )
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return True
+
+    def fail(
+        self, job_id: int, worker_id: str, error: str, retry_delay: float = 0.0
+    ) -> bool:
+        """
+        Release a leased job after a failure. It will be retried after
+        `retry_delay` seconds, unless it has reached `max_attempts`, in which
+        case it is moved to the dead letters.
+
+        :param job_id: The id of the job.
+        :param worker_id: The identifier of the worker owning the lease.
+        :param error: The description of the failure.
+        :param retry_delay: (optionnal) The delay before the job is retried.
+        :type job_id: `int`
+        :type worker_id: `str`
+        :type error: `str`
+        :type retry_delay: `float`
+        :return: Whether the lease was still owned by `worker_id`.
+        :rtype: `bool`
+        """
+
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND leased_by = ?",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                return False
+
+            if row[0] >= self._max_attempts:
+                self._bury(job_id=job_id, error=error)
+            else:
+                db.execute(
+                    "UPDATE jobs SET visible_at = ?, leased_by = NULL,"
+                    " last_error = ? WHERE id = ?",
+                    (time.time() + retry_delay, error, job_id),
+                )
+        return True
+
+    def _bury(self, job_id: int, error: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO dead_letters"
+            " SELECT id, payload, attempts, ?, ? FROM jobs WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+        self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def stats(self) -> dict:
+        """
+        Count the jobs by state.
+
+        :return: The count of `pending`, `leased`, `done` and `dead` jobs.
+        :rtype: `dict`
+        """
+
+        now = time.time()
+        return {
+            "pending": self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE visible_at <= ?", (now,)
+            ).fetchone()[0],
+            "leased": self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE visible_at > ?", (now,)
+            ).fetchone()[0],
+            "done": self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "dead": self._db.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0],
+        }
+
+    def results(self) -> typing.Generator[dict, typing.Any, typing.Any]:
+        """
+        Iterate over the results of the finished jobs.
+
+        :rtype: `typing.Generator[dict, typing.Any, typing.Any]`
+        """
+
+        for job_id, result in self._db.execute(
+            "SELECT id, result FROM results ORDER BY id"
+        ):
+            yield {**json.loads(result), "id": job_id}
+
+    def dead_letters(self) -> typing.Generator[dict, typing.Any, typing.Any]:
+        """
+        Iterate over the jobs which failed too many times.
+
+        :return: Each job with its queue `id`, `attempts` and `last_error`.
+        :rtype: `typing.Generator[dict, typing.Any, typing.Any]`
+        """
+
+        for job_id, payload, attempts, last_error in self._db.execute(
+            "SELECT id, payload, attempts, last_error FROM dead_letters ORDER BY id"
+        ):
+            yield {
+                **json.loads(payload),
+                "id": job_id,
+                "attempts": attempts,
+                "last_error": last_error,
+            }
+
+    def work(
+        self,
+        batch: LMDOIT_Batch | None = None,
+        worker_id: str | None = None,
+        batch_size: int = 10,
+        stop_when_empty: bool = True,
+        poll_interval: float = 1.0,
+        retry_delay: float = 0.0,
+    ) -> dict:
+        """
+        Claim batches of jobs, run them and record their results until the
+        queue is empty (or forever if `stop_when_empty` is `False`).
+
+        :param batch: (optionnal) The batch runner executing the jobs.
+        :param worker_id: (optionnal) The identifier of the worker, defaults
+        to the host name and process id.
+        :param batch_size: The maximum count of jobs claimed at once.
+        :param stop_when_empty: Return once no job is visible.
+        :param poll_interval: The delay between two polls of an empty queue.
+        :param retry_delay: The delay before a failed job is retried.
+        :type batch: :class:`LMDOIT_Batch` | `None`
+        :type worker_id: `str` | `None`
+        :type batch_size: `int`
+        :type stop_when_empty: `bool`
+        :type poll_interval: `float`
+        :type retry_delay: `float`
+        :return: The count of `succeeded` and `failed` jobs, and of jobs
+        whose lease was `lost` (reclaimed by another worker) before their
+        result was recorded.
+        :rtype: `dict`
+        """
+
+        if batch is None:
+            batch = LMDOIT_Batch()
+
+        if not isinstance(batch, LMDOIT_Batch):
+            raise ValueError("Invalid type for 'batch'.")
+
+        if worker_id is None:
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+
+        summary = {"succeeded": 0, "failed": 0, "lost": 0}
+
+        # The leases of the running jobs are extended in the background, so
+        # jobs running longer than `visibility_timeout` are not run twice.
+        running = set()
+        lock = threading.Lock()
+        stop = threading.Event()
+        keeper = threading.Thread(
+            target=self._keep_leases,
+            kwargs={
+                "worker_id": worker_id,
+                "running": running,
+                "lock": lock,
+                "stop": stop,
+            },
+            daemon=True,
+        )
+        keeper.start()
+
+        try:
+            while True:
+                jobs = self.claim(worker_id=worker_id, batch_size=batch_size)
+                if len(jobs) == 0:
+                    if stop_when_empty:
+                        return summary
+                    time.sleep(poll_interval)
+                    continue
+
+                with lock:
+                    running.update([job["id"] for job in jobs])
+
+                for result in batch.run(jobs=jobs):
+                    with lock:
+                        running.discard(result["id"])
+
+                    if result["ok"]:
+                        summary["succeeded"] += 1
+                        owned = self.complete(
+                            job_id=result["id"], worker_id=worker_id, result=result
+                        )
+                    else:
+                        summary["failed"] += 1
+                        owned = self.fail(
+                            job_id=result["id"],
+                            worker_id=worker_id,
+                            error=result["error"],
+                            retry_delay=retry_delay,
+                        )
+                    if not owned:
+                        summary["lost"] += 1
+        finally:
+            stop.set()
+            keeper.join()
@@ -1,6 +1,67 @@
+import codecs
+import pathlib
+import typing
+import urllib.parse
+
 import requests
 
+from . import Script
 from .Response import LMDOIT_Response
+from .Store import LMDOIT_Store
+
+def _iter_available_content(
+    response: requests.Response,
+) -> typing.Generator[bytes, typing.Any, typing.Any]:
+    # `iter_content` waits for a full chunk, `read1` returns whatever already
+    # arrived, which lets the caller work while the download goes on.
+    if not hasattr(response.raw, "read1"):
+        yield from response.iter_content(chunk_size=1024 * 64)
+        return
+
+    while True:
+        chunk = response.raw.read1(1024 * 64, decode_content=True)
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def _iter_decoded_content(
+    response: requests.Response,
+) -> typing.Generator[str, typing.Any, typing.Any]:
+    # Without a charset in the headers, the first bytes are held back until
+    # the resolver has enough of them to sniff a BOM or a `<meta charset>`.
+    resolver = LMDOIT_Response.charset_resolver
+    content_type = response.headers.get("Content-Type", None)
+    encoding = resolver.from_headers(content_type=content_type)
+    decoder = None
+    head = b""
+
+    def make_decoder():
+        return codecs.getincrementaldecoder(
+            encoding
+            or resolver.resolve(
+                content_type=content_type,
+                content=head,
+                host=urllib.parse.urlsplit(response.url).hostname,
+            )
+        )(errors="replace")
+
+    for chunk in _iter_available_content(response=response):
+        if decoder is None and encoding is None:
+            head += chunk
+            if len(head) < resolver.sniff_bytes:
+                continue
+            chunk = head
+
+        if decoder is None:
+            decoder = make_decoder()
+        yield decoder.decode(chunk)
+
+    if decoder is None:
+        decoder = make_decoder()
+        yield decoder.decode(head)
+    yield decoder.decode(b"", final=True)
+
 
 class LMDOIT_Request_Process:
     def __init__(self, session: requests.Session, url: str, method: str) -> None:
@@ -79,11 +140,135 @@ class LMDOIT_Request_Process:
         }.items():
             yield (k, v)
 
-    def get_response(self) -> LMDOIT_Response:
-        response = self._session.request(
+    def _send(
+        self, stream: bool = False, extra_headers: dict | None = None
+    ) -> requests.Response:
+        return self._session.request(
             method=self._method,
             url=self._url,
             params=self._params,
-            headers=self._custom_headers,
+            headers={**self._custom_headers, **(extra_headers or {})},
+            stream=stream,
         )
-        return LMDOIT_Response(session=self._session, response=response)
+
+    def get_response(self) -> LMDOIT_Response:
+        return LMDOIT_Response(session=self._session, response=self._send())
+
+    def download(self, output_dest: str | pathlib.Path) -> requests.Response:
+        """
+        Stream the response body into the file at `output_dest`, without
+        holding it in memory nor parsing it.
+
+        :param output_dest: The output destination of the file.
+        :type output_dest: `str` | `pathlib.Path`
+        :return: The consumed response, for its status code and headers.
+        :rtype: `requests.Response`
+        """
+
+        if isinstance(output_dest, str):
+            output_dest = pathlib.Path(output_dest)
+
+        if not isinstance(output_dest, pathlib.Path):
+            raise ValueError("Invalid type for 'output_dest'.")
+
+        with self._send(stream=True) as response:
+            response.raise_for_status()
+            output_dest.absolute().parent.mkdir(parents=True, exist_ok=True)
+            # The destination may be a hard link to a stored blob, it is
+            # replaced instead of being rewritten.
+            output_dest.absolute().unlink(missing_ok=True)
+            with open(file=output_dest.absolute(), mode="wb+") as stream:
+                for chunk in response.iter_content(chunk_size=1024 * 64):
+                    stream.write(chunk)
+
+        return response
+
+    def stream_json_objects_from_script_elements(
+        self, application_json_only: bool = False
+    ) -> typing.Generator[typing.Any, typing.Any, typing.Any]:
+        """
+        Same as :meth:`LMDOIT_Response.find_json_objects_from_script_elements`
+        but the body is tokenized while it is downloaded : each JSON object is
+        yielded as soon as its script is closed, and neither the page nor a
+        parse tree is ever held in memory.
+
+        :param application_json_only: Only load JSON scripts.
+        :type application_json_only: `bool`
+        :return: The found JSON objects.
+        :rtype: `typing.Generator[typing.Any, typing.Any, typing.Any]`
+        """
+
+        if not isinstance(application_json_only, bool):
+            raise ValueError("Invalid type for 'application_json_only'.")
+
+        with self._send(stream=True) as response:
+            response.raise_for_status()
+            chunks = _iter_decoded_content(response=response)
+            yield from Script.iter_json_objects(
+                scripts=Script.iter_scripts(chunks=chunks),
+                application_json_only=application_json_only,
+            )
+
+    def _prepared_url(self) -> str:
+        prepared = requests.models.PreparedRequest()
+        prepared.prepare_url(url=self._url, params=self._params)
+        return prepared.url
+
+    def download_to_store(
+        self,
+        store: LMDOIT_Store,
+        output_dest: str | pathlib.Path,
+        skip_if_up_to_date: bool = True,
+    ) -> bool:
+        """
+        Stream the response body into the content-addressed `store` and make
+        it available at `output_dest`, without holding it in memory.
+
+        When `skip_if_up_to_date` is set and the URL is already indexed, a
+        `HEAD` request checks the `ETag` / `Last-Modified` headers first and
+        the known content is linked without being downloaded again.
+
+        :param store: The store holding the downloaded bodies.
+        :param output_dest: The output destination of the file.
+        :param skip_if_up_to_date: (optionnal) Check the known content first.
+        :type store: :class:`LMDOIT_Store`
+        :type output_dest: `str` | `pathlib.Path`
+        :type skip_if_up_to_date: `bool`
+        :return: Whether the body was downloaded (`False` when skipped).
+        :rtype: `bool`
+        """
+
+        if not isinstance(store, LMDOIT_Store):
+            raise ValueError("Invalid type for 'store'.")
+
+        if not isinstance(skip_if_up_to_date, bool):
+            raise ValueError("Invalid type for 'skip_if_up_to_date'.")
+
+        return self._download_to_store(
+            store=store, output_dest=output_dest, skip_if_up_to_date=skip_if_up_to_date
+        )[0]
+
+    def _download_to_store(
+        self,
+        store: LMDOIT_Store,
+        output_dest: str | pathlib.Path,
+        skip_if_up_to_date: bool,
+    ) -> tuple[bool, requests.Response]:
+        # Same as `download_to_store`, along with the last response received
+        # (the `HEAD` one when the download is skipped).
+        url = self._prepared_url()
+        if skip_if_up_to_date:
+            up_to_date, response = store._check_up_to_date(
+                session=self._session, url=url, headers=self._custom_headers
+            )
+            if up_to_date:
+                store.link(
+                    digest=store.lookup(url=url)["digest"], output_dest=output_dest
+                )
+                return False, response
+
+        with self._send(stream=True) as response:
+            response.raise_for_status()
+            store.save(response=response, output_dest=output_dest, url=url)
+
+        return True, response
@@ -1,15 +1,17 @@
 from __future__ import annotations  # Fix the circular import.
 
-import json
 import pathlib
 import re
 import typing
 import urllib.error
+import urllib.parse
 
-import bs4
 import requests
 
-from . import Request
+from . import Charset, Memory, Request, Script, Store
+
+if typing.TYPE_CHECKING:
+    import bs4
 
 OnErrorCallback = typing.Callable[
     [
@@ -20,20 +22,100 @@ OnErrorCallback = typing.Callable[
     typing.Any,
 ]
 
-_JSON_REGEX = re.compile(
-    r"(?:[{\[]{1}(?:[,:{}\[\]0-9.\-+Eaeflnr-u \n\r\t]|\".*?\")+[}\]]{1})",
-    flags=re.MULTILINE,
-)
+# A parse tree weighs roughly ten times its markup.
+_SOUP_COST_PER_CHAR = 10
 
 
 class LMDOIT_Response:
+    __slots__ = ("_session", "_response", "_text", "_soup", "__weakref__")
+
+    # Shared by all responses of the process, evicting the least recently
+    # used parse trees. They are rebuilt from the response text when needed.
+    memory_budget = Memory.LMDOIT_Memory_Budget(max_bytes=256 * 1024 * 1024)
+
+    # Shared by all responses of the process, so encodings are remembered by
+    # host across responses.
+    charset_resolver = Charset.LMDOIT_Charset_Resolver()
+
     def __init__(self, session: requests.Session, response: requests.Response) -> None:
         self._session = session
         self._response = response
 
-        self._soup = bs4.BeautifulSoup(
-            markup=self._response.text, features="html.parser"
-        )
+        self._text = None
+        self._soup = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """
+        Free everything the response keeps : the parse tree is decomposed and
+        the raw response, its body and the session are dropped. Any later use
+        of the response raises a `ValueError`.
+
+        It is called when leaving a `with` block :
+
+        :Example:
+        >>> with request.get_response() as response:
+        >>>     response.save_response_for_debug(output_dest="page.html")
+        """
+
+        self.memory_budget.forget(owner=self)
+        if self._soup is not None:
+            self._soup.decompose()
+            self._soup = None
+
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        self._text = None
+        self._session = None
+
+    def _evict(self) -> None:
+        # Called by the memory budget, the tree may still be referenced by
+        # tags handed out to the caller, so it is not decomposed.
+        self._soup = None
+
+    def _get_response(self) -> requests.Response:
+        if self._response is None:
+            raise ValueError("The response has been released.")
+        return self._response
+
+    def _get_text(self) -> str:
+        # Decoded once and shared by the parse tree, the script tokenizer and
+        # the regexes. `requests` would run charset detection over the whole
+        # body on each access of `.text`.
+        if self._text is None:
+            response = self._get_response()
+            response.encoding = self.charset_resolver.resolve(
+                content_type=response.headers.get("Content-Type", None),
+                content=response.content,
+                host=(
+                    urllib.parse.urlsplit(response.url).hostname
+                    if isinstance(response.url, str)
+                    else None
+                ),
+            )
+            self._text = str(response.content, response.encoding, errors="replace")
+        return self._text
+
+    def _get_soup(self) -> bs4.BeautifulSoup:
+        # `bs4` is only imported once a parse tree is really needed, so pure
+        # download jobs never pay for it.
+        soup = self._soup
+        if soup is None:
+            import bs4
+
+            text = self._get_text()
+            soup = bs4.BeautifulSoup(markup=text, features="html.parser")
+            self._soup = soup
+            self.memory_budget.track(owner=self, cost=len(text) * _SOUP_COST_PER_CHAR)
+        else:
+            self.memory_budget.touch(owner=self)
+        return soup
 
     def save_response_for_debug(self, output_dest: str | pathlib.Path):
         """
@@ -51,11 +133,34 @@ class LMDOIT_Response:
         if not isinstance(output_dest, pathlib.Path):
             raise ValueError("Invalid type for 'output_dest'.")
 
+        # The destination may be a hard link to a stored blob, it is replaced
+        # instead of being rewritten.
+        output_dest.absolute().unlink(missing_ok=True)
         with open(file=output_dest.absolute(), mode="wb+") as stream:
-            stream.write(self._response.content)
+            stream.write(self._get_response().content)
 
         return self
 
+    def save_response_to_store(
+        self, store: Store.LMDOIT_Store, output_dest: str | pathlib.Path
+    ):
+        """
+        Save the response into the content-addressed `store` and make it
+        available at `output_dest`. The same content downloaded from many URLs
+        is only written once.
+
+        :param store: The store holding the downloaded bodies.
+        :param output_dest: The output destination of the file.
+        :type store: :class:`LMDOIT_Store`
+        :type output_dest: `str` | `pathlib.Path`
+        """
+
+        if not isinstance(store, Store.LMDOIT_Store):
+            raise ValueError("Invalid type for 'store'.")
+
+        store.save(response=self._get_response(), output_dest=output_dest)
+        return self
+
     def find_html_element(
         self, css_selector: str, return_all_found: bool = False
     ) -> bs4.ResultSet[bs4.Tag] | bs4.Tag | None:
@@ -79,9 +184,9 @@ class LMDOIT_Response:
             raise ValueError("Invalid type for 'return_all_found'.")
 
         return (
-            self._soup.select(selector=css_selector)
-            if not return_all_found
-            else self._soup.select_one(selector=css_selector)
+            self._get_soup().select(selector=css_selector)
+            if return_all_found
+            else self._get_soup().select_one(selector=css_selector)
         )
 
     def find_all_script_elements(self) -> list[bs4.Tag]:
@@ -92,7 +197,7 @@ class LMDOIT_Response:
         :return: The list of found scripts.
         :rtype:  `list[bs4.Tag]`
         """
-        return self._soup.select(selector="script")
+        return self._get_soup().select(selector="script")
 
     def find_static_script_elements(self) -> list[bs4.Tag]:
         """
@@ -134,13 +239,6 @@ class LMDOIT_Response:
             if isinstance(src, str)
         ]
 
-    def _is_valid_json(self, o, /) -> bool:
-        try:
-            json.loads(o)
-        except json.decoder.JSONDecodeError:
-            return False
-        return True
-
     def find_json_objects_from_script_elements(
         self, application_json_only: bool = False
     ) -> typing.Generator[typing.Any, typing.Any, typing.Any]:
@@ -150,30 +248,24 @@ class LMDOIT_Response:
 
         Else, a RegEx is applied to try to fetch all JSON data.
 
+        When the parse tree has not been built yet, the scripts are read by
+        a lightweight tokenizer instead of building it.
+
         :return: The list of found JSON objects.
         :rtype:  `typing.Generator[typing.Any, typing.Any, typing.Any]`
         """
 
-        if application_json_only:
-            return list(
-                map(
-                    lambda s: json.loads(s.text),
-                    filter(
-                        lambda s: (
-                            s.has_attr("type") and s.attrs["type"] == "application/json"
-                        ),
-                        self.find_static_script_elements(),
-                    ),
-                )
-            )
+        if not isinstance(application_json_only, bool):
+            raise ValueError("Invalid type for 'application_json_only'.")
+
+        if self._soup is None:
+            scripts = Script.iter_scripts(chunks=[self._get_text()])
+        else:
+            scripts = map(lambda s: (s.attrs, s.text), self.find_all_script_elements())
 
-        for matchs in map(
-            lambda s: _JSON_REGEX.findall(s.text),
-            self.find_static_script_elements(),
-        ):
-            for m in matchs:
-                if self._is_valid_json(m):
-                    yield json.loads(m)
+        yield from Script.iter_json_objects(
+            scripts=scripts, application_json_only=application_json_only
+        )
 
     def match_regex(
         self, regex: str | re.Pattern, match_each_line: bool = True
@@ -197,14 +289,14 @@ class LMDOIT_Response:
         if not isinstance(regex, re.Pattern):
             raise ValueError("Invalid type for 'regex'.")
 
-        return regex.findall(string=self._response.text)
+        return regex.findall(string=self._get_text())
 
     def to_json(self):
         """
         Tries to return the response in a JSON format.
         """
 
-        return self._response.json()
+        return self._get_response().json()
 
     def handle_error(self, on_error_callback: OnErrorCallback):
         """
@@ -229,7 +321,7 @@ class LMDOIT_Response:
             raise ValueError("Invalid type for 'on_error_callback'.")
 
         try:
-            self._response.raise_for_status()
+            self._get_response().raise_for_status()
         except (urllib.error.HTTPError, requests.exceptions.HTTPError) as traceback:
             on_error_callback(self._session, self._response, traceback)
         return self
@@ -0,0 +1,109 @@
+import html.parser
+import json
+import re
+import typing
+
+_JSON_REGEX = re.compile(
+    r"(?:[{\[]{1}(?:[,:{}\[\]0-9.\-+Eaeflnr-u \n\r\t]|\".*?\")+[}\]]{1})",
+    flags=re.MULTILINE,
+)
+
+Script = tuple[dict, str]
+
+
+class LMDOIT_Script_Parser(html.parser.HTMLParser):
+    """
+    The LMDOIT Script Parser Interface
+
+    This class will tokenize HTML fed chunk by chunk and only keep the
+    `<script>` elements, as `(attributes, text)` tuples, without building any
+    tree. Only the script being read is buffered, so the memory used scales
+    with the largest script rather than with the page.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+
+        self._attrs = None
+        self._parts = None
+        self._scripts = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "script":
+            self._attrs = {k: "" if v is None else v for k, v in attrs}
+            self._parts = []
+
+    def handle_data(self, data: str) -> None:
+        if self._parts is not None:
+            self._parts.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "script" and self._parts is not None:
+            self._scripts.append((self._attrs, "".join(self._parts)))
+            self._attrs = None
+            self._parts = None
+
+    def pop_scripts(self) -> list[Script]:
+        """
+        Return the scripts completed since the last call.
+
+        :return: The `(attributes, text)` of each script.
+        :rtype: `list[tuple[dict, str]]`
+        """
+
+        scripts, self._scripts = self._scripts, []
+        return scripts
+
+
+def iter_scripts(
+    chunks: typing.Iterable[str],
+) -> typing.Generator[Script, typing.Any, typing.Any]:
+    """
+    Tokenize the HTML `chunks` and yield each script as soon as it is closed.
+
+    :param chunks: The HTML document, chunk by chunk.
+    :type chunks: `typing.Iterable[str]`
+    :return: The `(attributes, text)` of each script.
+    :rtype: `typing.Generator[tuple[dict, str], typing.Any, typing.Any]`
+    """
+
+    parser = LMDOIT_Script_Parser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.pop_scripts()
+    parser.close()
+    yield from parser.pop_scripts()
+
+
+def iter_json_objects(
+    scripts: typing.Iterable[Script], application_json_only: bool = False
+) -> typing.Generator[typing.Any, typing.Any, typing.Any]:
+    """
+    Yield the JSON objects found in static scripts. If `application_json_only`
+    is set to `True`, only `<script type="application/json" />` are loaded.
+
+    Else, a RegEx is applied to try to fetch all JSON data.
+
+    :param scripts: The `(attributes, text)` of each script.
+    :param application_json_only: Only load JSON scripts.
+    :type scripts: `typing.Iterable[tuple[dict, str]]`
+    :type application_json_only: `bool`
+    :return: The found JSON objects.
+    :rtype: `typing.Generator[typing.Any, typing.Any, typing.Any]`
+    """
+
+    for attrs, text in scripts:
+        if "src" in attrs:
+            continue
+
+        if application_json_only:
+            if attrs.get("type", None) == "application/json":
+                yield json.loads(text)
+            continue
+
+        for m in _JSON_REGEX.findall(text):
+            try:
+                data = json.loads(m)
+            except json.decoder.JSONDecodeError:
+                continue
+            yield data
@@ -0,0 +1,347 @@
+import abc
+import csv
+import io
+import json
+import os
+import pathlib
+import queue
+import threading
+import typing
+
+
+class LMDOIT_Sink(abc.ABC):
+    """
+    The LMDOIT Sink Interface
+
+    This class will write a stream of records into files :
+    -   records are buffered in batches of `batch_size`,
+    -   batches are written by a background thread, at most
+        `max_pending_batches` wait for it, so memory stays bounded,
+    -   each batch is written whole or not at all,
+    -   files are written as `.partial` and renamed once complete, a new file
+        is started once `max_file_bytes` is reached.
+
+    Without `max_file_bytes`, the records go to `output_dest`. Else, they go
+    to numbered files next to it (`data-00000.jsonl`, `data-00001.jsonl`, ...).
+
+    This class is abstract, use one of the sinks of a given format.
+    """
+
+    def __init__(
+        self,
+        output_dest: str | pathlib.Path,
+        batch_size: int = 1000,
+        max_pending_batches: int = 4,
+        max_file_bytes: int | None = None,
+    ) -> None:
+        if isinstance(output_dest, str):
+            output_dest = pathlib.Path(output_dest)
+
+        if not isinstance(output_dest, pathlib.Path):
+            raise ValueError("Invalid type for 'output_dest'.")
+
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("Invalid value for 'batch_size'.")
+
+        if not isinstance(max_pending_batches, int) or max_pending_batches < 1:
+            raise ValueError("Invalid value for 'max_pending_batches'.")
+
+        if max_file_bytes is not None and (
+            not isinstance(max_file_bytes, int) or max_file_bytes < 1
+        ):
+            raise ValueError("Invalid value for 'max_file_bytes'.")
+
+        self._output_dest = output_dest.absolute()
+        self._output_dest.parent.mkdir(parents=True, exist_ok=True)
+        self._batch_size = batch_size
+        self._max_file_bytes = max_file_bytes
+
+        self._buffer = []
+        self._queue = queue.Queue(maxsize=max_pending_batches)
+        self._error = None
+        self._closed = False
+
+        self._part_index = 0
+        self._part_path = None
+        self._written_paths = []
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def written_paths(self) -> list[pathlib.Path]:
+        """
+        The complete files written so far.
+        """
+        return list(self._written_paths)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def write(self, record: dict):
+        """
+        Add a record, it will be written with its batch.
+
+        :param record: The record to write.
+        :type record: `dict`
+        """
+
+        if self._closed:
+            raise ValueError("The sink is closed.")
+
+        if not isinstance(record, dict):
+            raise ValueError("Invalid type for 'record'.")
+
+        self._raise_error()
+        self._buffer.append(record)
+        if len(self._buffer) >= self._batch_size:
+            self._queue.put(self._buffer)
+            self._buffer = []
+        return self
+
+    def write_many(self, records: typing.Iterable[dict]):
+        """
+        Add all `records`, consuming them lazily.
+
+        :param records: The records to write.
+        :type records: `typing.Iterable[dict]`
+        """
+
+        for record in records:
+            self.write(record=record)
+        return self
+
+    def flush(self):
+        """
+        Write the buffered records and wait for every pending batch.
+        """
+
+        if len(self._buffer) > 0:
+            self._queue.put(self._buffer)
+            self._buffer = []
+        self._queue.join()
+        self._raise_error()
+        return self
+
+    def close(self) -> None:
+        """
+        Write everything left and complete the current file.
+        """
+
+        if self._closed:
+            return
+
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    if self._part_path is not None:
+                        if self._error is None:
+                            self._complete_part()
+                        else:
+                            # The `.partial` file is left, holding the
+                            # batches written before the failure.
+                            self._close_part()
+                    return
+                if self._error is None:
+                    self._write(batch=batch)
+            except Exception as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _final_path(self) -> pathlib.Path:
+        if self._max_file_bytes is None:
+            return self._output_dest
+
+        return self._output_dest.with_name(
+            f"{self._output_dest.stem}-{self._part_index:05d}{self._output_dest.suffix}"
+        )
+
+    def _write(self, batch: list[dict]) -> None:
+        if self._part_path is None:
+            part_path = pathlib.Path(f"{self._final_path()}.partial")
+            self._open_part(path=part_path)
+            self._part_path = part_path
+
+        self._write_batch(batch=batch)
+
+        if (
+            self._max_file_bytes is not None
+            and os.path.getsize(self._part_path) >= self._max_file_bytes
+        ):
+            self._complete_part()
+
+    def _complete_part(self) -> None:
+        self._close_part()
+        final_path = self._final_path()
+        os.replace(self._part_path, final_path)
+
+        self._written_paths.append(final_path)
+        self._part_path = None
+        self._part_index += 1
+
+    @abc.abstractmethod
+    def _open_part(self, path: pathlib.Path) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _write_batch(self, batch: list[dict]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _close_part(self) -> None:
+        pass
+
+
+class _LMDOIT_Text_Sink(LMDOIT_Sink):
+    # A batch is encoded first, then written at once. A failed write is
+    # truncated away, so the file only ever holds whole batches.
+
+    def _open_part(self, path: pathlib.Path) -> None:
+        self._stream = open(file=path, mode="wb")
+        self._stream.write(self._header())
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        data = self._encode(batch=batch)
+        position = self._stream.tell()
+        try:
+            self._stream.write(data)
+            self._stream.flush()
+            os.fsync(self._stream.fileno())
+        except BaseException:
+            self._stream.truncate(position)
+            raise
+
+    def _close_part(self) -> None:
+        self._stream.close()
+
+    def _header(self) -> bytes:
+        return b""
+
+    @abc.abstractmethod
+    def _encode(self, batch: list[dict]) -> bytes:
+        pass
+
+
+class LMDOIT_JSONL_Sink(_LMDOIT_Text_Sink):
+    """
+    The LMDOIT JSONL Sink Interface
+
+    This class will write one JSON record per line (see :class:`LMDOIT_Sink`).
+    """
+
+    def _encode(self, batch: list[dict]) -> bytes:
+        return "".join(
+            [json.dumps(record, ensure_ascii=False) + "\n" for record in batch]
+        ).encode("utf-8")
+
+
+class LMDOIT_CSV_Sink(_LMDOIT_Text_Sink):
+    """
+    The LMDOIT CSV Sink Interface
+
+    This class will write records as CSV rows (see :class:`LMDOIT_Sink`). The
+    columns are `fieldnames`, or the keys of the first record. Each file
+    starts with a header row, nested values are written as JSON. A record
+    with a key outside of the columns is rejected, missing keys are left
+    empty.
+    """
+
+    def __init__(
+        self,
+        output_dest: str | pathlib.Path,
+        fieldnames: list[str] | None = None,
+        **kwargs,
+    ) -> None:
+        if fieldnames is not None and not isinstance(fieldnames, list):
+            raise ValueError("Invalid type for 'fieldnames'.")
+
+        self._fieldnames = fieldnames
+        super().__init__(output_dest=output_dest, **kwargs)
+
+    def write(self, record: dict):
+        if isinstance(record, dict):
+            if self._fieldnames is None:
+                self._fieldnames = list(record.keys())
+
+            unknown = [k for k in record.keys() if k not in self._fieldnames]
+            if len(unknown) > 0:
+                raise ValueError(f"Unknown keys in 'record' : {unknown}.")
+        return super().write(record=record)
+
+    def _rows(self, rows: list[dict]) -> bytes:
+        stream = io.StringIO()
+        writer = csv.DictWriter(stream, fieldnames=self._fieldnames)
+        if len(rows) == 0:
+            writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    k: json.dumps(v) if isinstance(v, (dict, list)) else v
+                    for k, v in row.items()
+                }
+            )
+        return stream.getvalue().encode("utf-8")
+
+    def _header(self) -> bytes:
+        return self._rows(rows=[])
+
+    def _encode(self, batch: list[dict]) -> bytes:
+        return self._rows(rows=batch)
+
+
+class LMDOIT_Parquet_Sink(LMDOIT_Sink):
+    """
+    The LMDOIT Parquet Sink Interface
+
+    This class will write records as Parquet row groups, one per batch (see
+    :class:`LMDOIT_Sink`). The schema is inferred from the first batch. It
+    requires `pyarrow`.
+    """
+
+    def __init__(self, output_dest: str | pathlib.Path, **kwargs) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError(
+                "'pyarrow' is required to write Parquet files."
+            ) from error
+
+        self._pyarrow = pyarrow
+        self._schema = None
+        super().__init__(output_dest=output_dest, **kwargs)
+
+    def _open_part(self, path: pathlib.Path) -> None:
+        self._path = path
+        self._writer = None
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        table = self._pyarrow.Table.from_pylist(batch, schema=self._schema)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._pyarrow.parquet.ParquetWriter(
+                where=str(self._path), schema=self._schema
+            )
+        self._writer.write_table(table)
+
+    def _close_part(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
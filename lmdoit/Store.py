@@ -0,0 +1,314 @@
+import hashlib
+import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+import typing
+
+import requests
+
+_CHUNK_SIZE = 1024 * 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+"""
+
+
+class LMDOIT_Store:
+    """
+    The LMDOIT Store Interface
+
+    This class will store downloaded bodies by their content digest :
+    -   each body is hashed while it is being streamed,
+    -   each distinct body is written once under `objects/`,
+    -   requested destinations are hard links to the stored blob, blobs are
+        read-only so a linked destination must be replaced, never rewritten,
+    -   an URL to digest index, kept in SQLite and shared by every process
+        using the same `root`, allows skipping already known content.
+    """
+
+    def __init__(self, root: str | pathlib.Path, algorithm: str = "blake2b") -> None:
+        if isinstance(root, str):
+            root = pathlib.Path(root)
+
+        if not isinstance(root, pathlib.Path):
+            raise ValueError("Invalid type for 'root'.")
+
+        if algorithm not in hashlib.algorithms_available:
+            raise ValueError("Unknown hash 'algorithm'.")
+
+        self._root = root.absolute()
+        self._algorithm = algorithm
+        self._lock = threading.Lock()
+
+        (self._root / "objects").mkdir(parents=True, exist_ok=True)
+        (self._root / "tmp").mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(
+            database=self._root / "index.sqlite3",
+            timeout=60,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def path_of(self, digest: str) -> pathlib.Path:
+        """
+        Return the path of the blob identified by `digest`. The blobs are
+        sharded on two levels using the first four hexadecimal characters.
+
+        :param digest: The hexadecimal digest of the blob.
+        :type digest: `str`
+        :return: The path of the blob, which may not exist yet.
+        :rtype: `pathlib.Path`
+        """
+
+        if not isinstance(digest, str):
+            raise ValueError("Invalid type for 'digest'.")
+
+        return self._root / "objects" / digest[0:2] / digest[2:4] / digest
+
+    def has(self, digest: str) -> bool:
+        """
+        Check whether the blob identified by `digest` is stored.
+
+        :param digest: The hexadecimal digest of the blob.
+        :type digest: `str`
+        :rtype: `bool`
+        """
+        return self.path_of(digest=digest).is_file()
+
+    def put(self, chunks: typing.Iterable[bytes]) -> str:
+        """
+        Hash and store the `chunks` while they are consumed. The blob is
+        written only once, no matter how many times the same content is put.
+
+        :param chunks: The body to store, chunk by chunk.
+        :type chunks: `typing.Iterable[bytes]`
+        :return: The hexadecimal digest of the stored blob.
+        :rtype: `str`
+        """
+
+        hasher = hashlib.new(self._algorithm)
+        fd, tmp_name = tempfile.mkstemp(dir=self._root / "tmp")
+
+        try:
+            with os.fdopen(fd, mode="wb") as stream:
+                for chunk in chunks:
+                    if not isinstance(chunk, bytes):
+                        raise ValueError("Invalid type for 'chunks'.")
+                    hasher.update(chunk)
+                    stream.write(chunk)
+
+            digest = hasher.hexdigest()
+            blob = self.path_of(digest=digest)
+
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.chmod(tmp_name, 0o444)
+                # A link never replaces the blob stored meanwhile by another
+                # thread or process, which may already be linked elsewhere.
+                try:
+                    os.link(tmp_name, blob)
+                except FileExistsError:
+                    pass
+                except OSError:
+                    os.replace(tmp_name, blob)
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        return digest
+
+    def link(self, digest: str, output_dest: str | pathlib.Path) -> pathlib.Path:
+        """
+        Make the blob identified by `digest` available at `output_dest`. A
+        hard link is used when possible, else the blob is copied.
+
+        :param digest: The hexadecimal digest of the blob.
+        :param output_dest: The output destination of the file.
+        :type digest: `str`
+        :type output_dest: `str` | `pathlib.Path`
+        :return: The absolute output destination.
+        :rtype: `pathlib.Path`
+        """
+
+        if isinstance(output_dest, str):
+            output_dest = pathlib.Path(output_dest)
+
+        if not isinstance(output_dest, pathlib.Path):
+            raise ValueError("Invalid type for 'output_dest'.")
+
+        blob = self.path_of(digest=digest)
+        if not blob.is_file():
+            raise ValueError(f"Unknown 'digest' : {digest}.")
+
+        output_dest = output_dest.absolute()
+        output_dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_dest.exists() or output_dest.is_symlink():
+            if output_dest.is_file() and os.path.samefile(blob, output_dest):
+                return output_dest
+            output_dest.unlink()
+
+        try:
+            os.link(blob, output_dest)
+        except OSError:
+            shutil.copyfile(blob, output_dest)
+
+        return output_dest
+
+    def lookup(self, url: str) -> dict | None:
+        """
+        Return the index entry of `url` if its content is known and stored.
+
+        :param url: The URL of the downloaded content.
+        :type url: `str`
+        :return: The entry (`digest`, `etag`, `last_modified`) or `None`.
+        :rtype: `dict` | `None`
+        """
+
+        if not isinstance(url, str):
+            raise ValueError("Invalid type for 'url'.")
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None or not self.has(digest=row[0]):
+            return None
+        return {"digest": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def record(
+        self,
+        url: str,
+        digest: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        """
+        Remember that `url` served the blob identified by `digest`.
+
+        :param url: The URL of the downloaded content.
+        :param digest: The hexadecimal digest of the blob.
+        :param etag: (optionnal) The `ETag` header sent by the server.
+        :param last_modified: (optionnal) The `Last-Modified` header sent by
+        the server.
+        :type url: `str`
+        :type digest: `str`
+        :type etag: `str` | `None`
+        :type last_modified: `str` | `None`
+        """
+
+        if not isinstance(url, str):
+            raise ValueError("Invalid type for 'url'.")
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?)",
+                (url, digest, etag, last_modified),
+            )
+
+        return self
+
+    def save(
+        self,
+        response: requests.Response,
+        output_dest: str | pathlib.Path,
+        url: str | None = None,
+    ) -> str:
+        """
+        Stream the body of `response` into the store, link it at
+        `output_dest` and index it under `url`.
+
+        :param response: The response to store. It should be requested with
+        `stream=True` so the body is never fully held in memory.
+        :param output_dest: The output destination of the file.
+        :param url: (optionnal) The URL to index, defaults to the response URL.
+        :type response: `requests.Response`
+        :type output_dest: `str` | `pathlib.Path`
+        :type url: `str` | `None`
+        :return: The hexadecimal digest of the stored blob.
+        :rtype: `str`
+        """
+
+        if not isinstance(response, requests.Response):
+            raise ValueError("Invalid type for 'response'.")
+
+        digest = self.put(chunks=response.iter_content(chunk_size=_CHUNK_SIZE))
+        self.link(digest=digest, output_dest=output_dest)
+
+        if url is None:
+            url = response.url
+
+        if isinstance(url, str):
+            self.record(
+                url=url,
+                digest=digest,
+                etag=response.headers.get("ETag", None),
+                last_modified=response.headers.get("Last-Modified", None),
+            )
+
+        return digest
+
+    def is_up_to_date(
+        self, session: requests.Session, url: str, headers: dict | None = None
+    ) -> bool:
+        """
+        Check with a `HEAD` request whether the stored content of `url` is
+        still the one served. The `ETag` is compared first, then the
+        `Last-Modified` header. Without any of them, the content is considered
+        outdated.
+
+        :param session: The session to use to perform the `HEAD` request.
+        :param url: The URL of the downloaded content.
+        :param headers: (optionnal) The headers to send along.
+        :type session: `requests.Session`
+        :type url: `str`
+        :type headers: `dict` | `None`
+        :rtype: `bool`
+        """
+
+        return self._check_up_to_date(session=session, url=url, headers=headers)[0]
+
+    def _check_up_to_date(
+        self, session: requests.Session, url: str, headers: dict | None = None
+    ) -> tuple[bool, requests.Response | None]:
+        # Same as `is_up_to_date`, along with the `HEAD` response if any.
+        entry = self.lookup(url=url)
+        if entry is None or (entry["etag"] is None and entry["last_modified"] is None):
+            return False, None
+
+        response = session.head(url=url, headers=headers, allow_redirects=True)
+        if not response.ok:
+            return False, response
+
+        etag = response.headers.get("ETag", None)
+        if entry["etag"] is not None and etag is not None:
+            return etag == entry["etag"], response
+
+        last_modified = response.headers.get("Last-Modified", None)
+        return (
+            entry["last_modified"] is not None
+            and last_modified == entry["last_modified"]
+        ), response
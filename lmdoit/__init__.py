@@ -1,4 +1,14 @@
 from .Auth import LMDOIT_Auth_Process
 from .Request import LMDOIT_Request_Process
 from .Response import LMDOIT_Response
-from .LMDOIT import LMDOIT
\ No newline at end of file
+from .LMDOIT import LMDOIT
+from .Store import LMDOIT_Store
+from .Batch import LMDOIT_Batch
+from .Memory import LMDOIT_Memory_Budget
+from .Script import LMDOIT_Script_Parser
+from .Queue import LMDOIT_Queue
+from .Connection import LMDOIT_DNS_Cache, LMDOIT_HTTP_Adapter
+from .Charset import LMDOIT_Charset_Resolver
+from .Sink import LMDOIT_CSV_Sink, LMDOIT_JSONL_Sink, LMDOIT_Parquet_Sink, LMDOIT_Sink
+from .Fingerprint import LMDOIT_Fingerprint_Store
+from .Proxy import LMDOIT_Proxy_Pool
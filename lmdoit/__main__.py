@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import sys
+import typing
+
+from .Batch import LMDOIT_Batch
+from .Store import LMDOIT_Store
+
+
+def _open(path: str, mode: str, default: typing.TextIO):
+    if path == "-":
+        return contextlib.nullcontext(default)
+    return open(file=path, mode=mode, encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="lmdoit",
+        description="Run a JSONL file of requests and log their results as JSONL.",
+    )
+    parser.add_argument("jobs", help="the JSONL file of requests, '-' for stdin")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="the JSONL file of results, '-' for stdout (default)",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=8,
+        help="the count of requests running at the same time (default: 8)",
+    )
+    parser.add_argument(
+        "--store",
+        default=None,
+        help="the content-addressed store directory for downloaded bodies",
+    )
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("'--concurrency' must be at least 1.")
+
+    batch = LMDOIT_Batch(
+        concurrency=args.concurrency,
+        store=None if args.store is None else LMDOIT_Store(root=args.store),
+    )
+
+    with _open(args.jobs, "r", sys.stdin) as jobs_stream, _open(
+        args.output, "w", sys.stdout
+    ) as results_stream:
+        summary = batch.run_file(
+            jobs_stream=jobs_stream, results_stream=results_stream
+        )
+
+    print(
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed.",
+        file=sys.stderr,
+    )
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
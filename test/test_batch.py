@@ -0,0 +1,136 @@
+import http.server
+import io
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+from lmdoit.__main__ import main
+
+
+BODY = b"""<html><body>
+<h1>Title</h1>
+<h1>Subtitle</h1>
+<script>var data = {"answer": 42};</script>
+</body></html>"""
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_run_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            jobs = [
+                {"url": f"{self._url}/a", "output": os.path.join(root, "a.html")},
+                {
+                    "id": "extract",
+                    "url": f"{self._url}/b",
+                    "params": {"page": 2},
+                    "extract": {
+                        "regex": r"<h1>(.*)</h1>",
+                        "css_selector": "h1",
+                        "json_scripts": True,
+                    },
+                },
+                {"url": f"{self._url}/missing"},
+                "not a job",
+            ]
+            jobs_stream = io.StringIO(
+                "\n".join(map(json.dumps, jobs)) + "\n\n{broken\n"
+            )
+            results_stream = io.StringIO()
+
+            summary = LMDOIT_Batch(concurrency=2).run_file(
+                jobs_stream=jobs_stream, results_stream=results_stream
+            )
+            results = {
+                r["id"]: r
+                for r in map(json.loads, results_stream.getvalue().splitlines())
+            }
+
+            self.assertDictEqual(summary, {"succeeded": 2, "failed": 3})
+            self.assertTrue(results[1]["ok"])
+            self.assertEqual(results[1]["status_code"], 200)
+            self.assertEqual(pathlib.Path(root, "a.html").read_bytes(), BODY)
+            self.assertDictEqual(
+                results["extract"]["extracted"],
+                {
+                    "regex": ["Title", "Subtitle"],
+                    "css_selector": ["Title", "Subtitle"],
+                    "json_scripts": [{"answer": 42}],
+                },
+            )
+            self.assertFalse(results[3]["ok"])
+            self.assertEqual(results[3]["status_code"], 404)
+            self.assertEqual(results[4]["error"], "Invalid type for 'job'.")
+            self.assertTrue(results[6]["error"].startswith("JSONDecodeError"))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as root:
+            jobs_path = os.path.join(root, "jobs.jsonl")
+            results_path = os.path.join(root, "results.jsonl")
+            pathlib.Path(jobs_path).write_text(
+                json.dumps({"url": f"{self._url}/a", "output": os.path.join(root, "a")})
+                + "\n"
+                + json.dumps({"url": f"{self._url}/b", "output": os.path.join(root, "b")})
+            )
+
+            status = main(
+                [jobs_path, "-o", results_path, "--store", os.path.join(root, "store")]
+            )
+
+            self.assertEqual(status, 0)
+            results = list(map(json.loads, pathlib.Path(results_path).read_text().splitlines()))
+            self.assertListEqual([r["status_code"] for r in results], [200, 200])
+            self.assertTrue(
+                os.path.samefile(os.path.join(root, "a"), os.path.join(root, "b"))
+            )
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_does_not_load_parsers(self):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, lmdoit; print('bs4' in sys.modules, 'soupsieve' in sys.modules)",
+            ],
+            cwd=pathlib.Path(__file__).absolute().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+        self.assertEqual(output.strip(), "False False")
+
+
+if __name__ == "__main__":
+    unittest.main()
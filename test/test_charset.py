@@ -0,0 +1,212 @@
+import codecs
+import io
+import sys
+import unittest
+
+import requests
+import urllib3
+
+sys.path.append("../")
+from lmdoit import *
+from lmdoit.Request import _iter_decoded_content
+
+
+META_PAGE = '<html><head><meta charset="windows-1252"></head><body>café</body></html>'
+
+
+def make_response(content: bytes, content_type: str | None, url: str) -> LMDOIT_Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = content
+    if content_type is not None:
+        response.headers["Content-Type"] = content_type
+    return LMDOIT_Response(session=None, response=response)
+
+
+class TestCharsetResolver(unittest.TestCase):
+    def test_header_first(self):
+        resolver = LMDOIT_Charset_Resolver()
+
+        self.assertEqual(
+            resolver.resolve(
+                content_type='text/html; charset="ISO-8859-15"',
+                content=META_PAGE.encode("cp1252"),
+            ),
+            "iso8859-15",
+        )
+
+    def test_unknown_header_charset(self):
+        resolver = LMDOIT_Charset_Resolver()
+
+        self.assertEqual(
+            resolver.resolve(
+                content_type="text/html; charset=unknown",
+                content=META_PAGE.encode("cp1252"),
+            ),
+            "cp1252",
+        )
+
+    def test_bom(self):
+        resolver = LMDOIT_Charset_Resolver()
+
+        for content, encoding in [
+            (codecs.BOM_UTF8 + b"<html>", "utf-8-sig"),
+            (codecs.BOM_UTF16_LE + "<html>".encode("utf-16-le"), "utf-16"),
+            (codecs.BOM_UTF32_LE + "<html>".encode("utf-32-le"), "utf-32"),
+        ]:
+            self.assertEqual(
+                resolver.resolve(content_type="text/html", content=content), encoding
+            )
+
+    def test_meta_in_sniffed_prefix_only(self):
+        resolver = LMDOIT_Charset_Resolver(sniff_bytes=64, detect_bytes=32)
+        late_meta = (" " * 64 + META_PAGE).encode("ascii", errors="ignore")
+
+        self.assertEqual(
+            resolver.resolve(content_type="text/html", content=META_PAGE.encode("cp1252")),
+            "cp1252",
+        )
+        self.assertEqual(
+            resolver.resolve(content_type="text/html", content=late_meta), "utf-8"
+        )
+
+    def test_host_memory(self):
+        resolver = LMDOIT_Charset_Resolver()
+        resolver.resolve(
+            content_type="text/html",
+            content=META_PAGE.encode("cp1252"),
+            host="www.site.com",
+        )
+
+        self.assertEqual(
+            resolver.resolve(
+                content_type="text/html", content=b"<html></html>", host="www.site.com"
+            ),
+            "cp1252",
+        )
+        self.assertEqual(
+            resolver.resolve(
+                content_type="text/html", content=b"<html></html>", host="other.com"
+            ),
+            "utf-8",
+        )
+
+    def test_detection_not_remembered(self):
+        resolver = LMDOIT_Charset_Resolver()
+        resolver.resolve(
+            content_type="text/html",
+            content="<p>Déjà vu, à côté</p>".encode("cp1252"),
+            host="www.site.com",
+        )
+
+        self.assertEqual(
+            resolver.resolve(
+                content_type="text/html",
+                content="<p>日本語のページ</p>".encode("utf-8"),
+                host="www.site.com",
+            ),
+            "utf-8",
+        )
+        self.assertNotIn("www.site.com", resolver._hosts)
+
+    def test_utf8_before_host_memory(self):
+        resolver = LMDOIT_Charset_Resolver()
+        resolver.resolve(
+            content_type="text/html",
+            content=META_PAGE.encode("cp1252"),
+            host="www.site.com",
+        )
+
+        # The multibyte character may be cut by the end of the prefix.
+        self.assertEqual(
+            resolver.resolve(
+                content_type="text/html",
+                content="<p>日本語</p>".encode("utf-8")[:8],
+                host="www.site.com",
+            ),
+            "utf-8",
+        )
+        self.assertNotEqual(
+            resolver.resolve(
+                content_type="image/png",
+                content=b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR",
+                host="www.site.com",
+            ),
+            "cp1252",
+        )
+
+    def test_meta_utf16(self):
+        resolver = LMDOIT_Charset_Resolver()
+
+        for charset in ["utf-16", "UTF-16LE", "utf-32"]:
+            self.assertEqual(
+                resolver.resolve(
+                    content_type="text/html",
+                    content=f'<meta charset="{charset}"><p>a</p>'.encode("ascii"),
+                ),
+                "utf-8",
+            )
+
+    def test_json(self):
+        resolver = LMDOIT_Charset_Resolver()
+
+        self.assertEqual(
+            resolver.resolve(content_type="application/json", content=b'{"a": 1}'),
+            "utf-8",
+        )
+
+        # A host serving cp1252 pages still serves UTF-8 JSON.
+        resolver.resolve(
+            content_type="text/html",
+            content=META_PAGE.encode("cp1252"),
+            host="www.site.com",
+        )
+        self.assertEqual(
+            resolver.resolve(
+                content_type="application/json",
+                content='{"a": "é"}'.encode("utf-8"),
+                host="www.site.com",
+            ),
+            "utf-8",
+        )
+
+
+class TestResponseText(unittest.TestCase):
+    def test_meta_charset(self):
+        response = make_response(
+            content=META_PAGE.encode("cp1252"),
+            content_type="text/html",
+            url="https://meta.site.com/",
+        )
+
+        self.assertListEqual(response.match_regex(regex=r"caf."), ["café"])
+        self.assertEqual(
+            response.find_html_element(css_selector="body").text, "café"
+        )
+
+    def test_decoded_once(self):
+        response = make_response(
+            content="<p>déjà</p>".encode("utf-8"),
+            content_type=None,
+            url="https://once.site.com/",
+        )
+
+        self.assertIs(response._get_text(), response._get_text())
+        self.assertEqual(response._get_text(), "<p>déjà</p>")
+
+
+class TestStreamedText(unittest.TestCase):
+    def test_meta_charset(self):
+        response = requests.Response()
+        response.url = "https://stream.site.com/"
+        response.headers["Content-Type"] = "text/html"
+        response.raw = urllib3.response.HTTPResponse(
+            body=io.BytesIO(META_PAGE.encode("cp1252") * 200), preload_content=False
+        )
+
+        self.assertEqual("".join(_iter_decoded_content(response=response)), META_PAGE * 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import http.server
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDNSCache(unittest.TestCase):
+    def test_hits(self):
+        dns_cache = LMDOIT_DNS_Cache(ttl=60)
+        first = dns_cache.resolve(host="localhost", port=80)
+        second = dns_cache.resolve(host="localhost", port=80)
+
+        self.assertEqual(first, second)
+        self.assertDictEqual(dns_cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_ttl(self):
+        dns_cache = LMDOIT_DNS_Cache(ttl=0.05)
+        dns_cache.resolve(host="localhost", port=80)
+        time.sleep(0.1)
+        dns_cache.resolve(host="localhost", port=80)
+
+        self.assertDictEqual(dns_cache.stats(), {"hits": 0, "misses": 2})
+
+    def test_forget(self):
+        dns_cache = LMDOIT_DNS_Cache()
+        dns_cache.resolve(host="localhost", port=80)
+        dns_cache.forget(host="localhost", port=80)
+        dns_cache.resolve(host="localhost", port=80)
+
+        self.assertDictEqual(dns_cache.stats(), {"hits": 0, "misses": 2})
+
+
+class TestPrewarm(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://localhost:{self._server.server_address[1]}"
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_requests_reuse_prewarmed_connections(self):
+        lmdoit_api = LMDOIT(dns_cache=LMDOIT_DNS_Cache(), pool_maxsize=12)
+
+        self.assertEqual(
+            lmdoit_api.prewarm(hosts=[self._url], connections_per_host=12), 12
+        )
+        for _ in range(5):
+            lmdoit_api.no_auth(url=f"{self._url}/page", method="GET").get_response()
+
+        self.assertDictEqual(
+            lmdoit_api.connection_stats(),
+            {
+                "requests": 5,
+                "opened": 0,
+                "prewarmed": 12,
+                "reuse_ratio": 1.0,
+                "dns_hits": 11,
+                "dns_misses": 1,
+            },
+        )
+
+    def test_without_prewarm(self):
+        lmdoit_api = LMDOIT(dns_cache=LMDOIT_DNS_Cache())
+        for _ in range(4):
+            lmdoit_api.no_auth(url=f"{self._url}/page", method="GET").get_response()
+
+        stats = lmdoit_api.connection_stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["reuse_ratio"], 0.75)
+
+    def test_invalid_parameters(self):
+        lmdoit_api = LMDOIT()
+
+        with self.assertRaises(ValueError):
+            lmdoit_api.prewarm(hosts="www.site.com")
+        with self.assertRaises(ValueError):
+            lmdoit_api.prewarm(hosts=["www.site.com"], connections_per_host=0)
+        with self.assertRaises(ValueError):
+            lmdoit_api.prewarm(hosts=[self._url], connections_per_host=11)
+
+    def test_prewarm_again(self):
+        lmdoit_api = LMDOIT(dns_cache=LMDOIT_DNS_Cache(), pool_maxsize=4)
+
+        # The second call finds the connections of the first one in the pool.
+        self.assertEqual(lmdoit_api.prewarm(hosts=[self._url], connections_per_host=2), 2)
+        self.assertEqual(lmdoit_api.prewarm(hosts=[self._url], connections_per_host=4), 2)
+
+    def test_unreachable_first_address(self):
+        class _DNS_Cache(LMDOIT_DNS_Cache):
+            def _lookup(self, host: str, port: int) -> list[str]:
+                # Nothing listens on 127.0.0.2, the server is bound to 127.0.0.1.
+                return ["127.0.0.2", "127.0.0.1"]
+
+        dns_cache = _DNS_Cache()
+        lmdoit_api = LMDOIT(dns_cache=dns_cache)
+        response = lmdoit_api.no_auth(url=f"{self._url}/page", method="GET")._send()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            dns_cache.resolve(host="localhost", port=self._server.server_address[1]),
+            ["127.0.0.1", "127.0.0.2"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import hashlib
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+
+
+PAGES = {}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES[self.path].encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+        # Only the pages under "/etag/" are served with an ETag.
+        if self.path.startswith("/etag/") and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path.startswith("/etag/"):
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "fingerprints.sqlite3")
+        self._calls = 0
+
+        PAGES.clear()
+        PAGES.update(
+            {
+                "/a": "<h1>first</h1>",
+                "/etag/b": "<h1>second</h1>",
+                "/copy": "<h1>first</h1>",
+            }
+        )
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._dir.cleanup()
+
+    def _titles(self, response: LMDOIT_Response):
+        self._calls += 1
+        for tag in response.find_html_element(
+            css_selector="h1", return_all_found=True
+        ):
+            yield tag.text
+
+    def _run(self, store: LMDOIT_Fingerprint_Store, paths: list[str], version="1"):
+        api = LMDOIT()
+        store.begin_run()
+        return [
+            store.extract(
+                request=api.no_auth(url=f"{self._url}{path}", method="GET"),
+                extractor=self._titles,
+                version=version,
+            )
+            for path in paths
+        ]
+
+    def test_incremental_runs(self):
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            self.assertListEqual(
+                self._run(store=store, paths=["/a", "/etag/b"]), [["first"], ["second"]]
+            )
+            self.assertDictEqual(
+                store.stats(),
+                {
+                    "new": 2,
+                    "changed": 0,
+                    "unchanged": 0,
+                    "not_modified": 0,
+                    "extracted": 2,
+                    "reused": 0,
+                },
+            )
+
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            self.assertListEqual(
+                self._run(store=store, paths=["/a", "/etag/b"]), [["first"], ["second"]]
+            )
+            self.assertDictEqual(
+                store.stats(),
+                {
+                    "new": 0,
+                    "changed": 0,
+                    "unchanged": 2,
+                    "not_modified": 1,
+                    "extracted": 0,
+                    "reused": 2,
+                },
+            )
+
+            PAGES["/etag/b"] = "<h1>updated</h1>"
+            self.assertListEqual(
+                self._run(store=store, paths=["/a", "/etag/b"]), [["first"], ["updated"]]
+            )
+            self.assertEqual(store.stats()["changed"], 1)
+            self.assertEqual(store.stats()["extracted"], 1)
+
+        self.assertEqual(self._calls, 3)
+
+    def test_same_body_under_another_url(self):
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            self._run(store=store, paths=["/a", "/copy"])
+
+            self.assertEqual(store.stats()["new"], 2)
+            self.assertEqual(store.stats()["reused"], 1)
+            self.assertEqual(self._calls, 1)
+
+    def test_caller_conditional_headers(self):
+        body = PAGES["/etag/b"].encode()
+        request = LMDOIT().no_auth(url=f"{self._url}/etag/b", method="GET")
+        request.set_custom_headers(
+            headers={"If-None-Match": f'"{hashlib.md5(body).hexdigest()}"'}
+        )
+
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            self.assertListEqual(
+                store.extract(request=request, extractor=self._titles), ["second"]
+            )
+            self.assertEqual(store.stats()["new"], 1)
+
+    def test_anonymous_extractors(self):
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            request = LMDOIT().no_auth(url=f"{self._url}/a", method="GET")
+            with self.assertRaises(ValueError):
+                store.extract(request=request, extractor=lambda response: 1)
+
+            results = [
+                store.extract(
+                    request=LMDOIT().no_auth(url=f"{self._url}/a", method="GET"),
+                    extractor=extractor,
+                    extractor_id=extractor_id,
+                )
+                for extractor, extractor_id in [
+                    (lambda response: 1, "one"),
+                    (lambda response: 2, "two"),
+                ]
+            ]
+
+            self.assertListEqual(results, [1, 2])
+
+    def test_version_bump(self):
+        with LMDOIT_Fingerprint_Store(path=self._path) as store:
+            self._run(store=store, paths=["/etag/b"])
+            self.assertListEqual(
+                self._run(store=store, paths=["/etag/b"], version="2"), [["second"]]
+            )
+
+            self.assertEqual(store.stats()["not_modified"], 1)
+            self.assertEqual(store.stats()["extracted"], 1)
+            self.assertEqual(self._calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import http.server
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+
+
+def _proxy_server(name: str, delay: float = 0.0, body_delay: float = 0.0):
+    # A stand-in forward proxy : it answers the absolute URI requests itself.
+    state = {"active": 0, "max_active": 0, "requests": 0, "failing": False}
+    lock = threading.Lock()
+
+    class _Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                state["active"] += 1
+                state["requests"] += 1
+                state["max_active"] = max(state["max_active"], state["active"])
+            try:
+                time.sleep(delay)
+                if state["failing"]:
+                    self.send_response(502)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = f"{name} {self.path} {self.headers.get('Cookie', '')}".encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Set-Cookie", f"via={name}; Path=/")
+                self.end_headers()
+                self.wfile.flush()
+                time.sleep(body_delay)
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def _dead_proxy() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class TestProxyPool(unittest.TestCase):
+    def setUp(self):
+        self._servers = []
+
+    def tearDown(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def _proxy(self, name: str, delay: float = 0.0, body_delay: float = 0.0):
+        server, url, state = _proxy_server(name=name, delay=delay, body_delay=body_delay)
+        self._servers.append(server)
+        return url, state
+
+    def test_concurrency_cap(self):
+        a, a_state = self._proxy(name="a", delay=0.05)
+        b, b_state = self._proxy(name="b", delay=0.05)
+        pool = LMDOIT_Proxy_Pool(proxies=[a, b], max_concurrency_per_proxy=2)
+
+        threads = [
+            threading.Thread(
+                target=pool.request, kwargs={"method": "GET", "url": "http://target/"}
+            )
+            for _ in range(12)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(a_state["max_active"], 2)
+        self.assertLessEqual(b_state["max_active"], 2)
+        self.assertEqual(a_state["requests"] + b_state["requests"], 12)
+        self.assertGreater(a_state["requests"], 0)
+        self.assertGreater(b_state["requests"], 0)
+
+    def test_streamed_body_keeps_the_proxy(self):
+        slow, slow_state = self._proxy(name="slow", body_delay=0.05)
+        pool = LMDOIT_Proxy_Pool(proxies=[slow], max_concurrency_per_proxy=1)
+        api = LMDOIT(proxy_pool=pool)
+
+        with tempfile.TemporaryDirectory() as root:
+            threads = [
+                threading.Thread(
+                    target=api.no_auth(url=f"http://target/{i}", method="GET").download,
+                    kwargs={"output_dest": os.path.join(root, str(i))},
+                )
+                for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(os.listdir(root)), 4)
+
+        self.assertEqual(slow_state["requests"], 4)
+        self.assertEqual(slow_state["max_active"], 1)
+        self.assertEqual(pool.stats()[0]["in_flight"], 0)
+        self.assertGreaterEqual(pool.stats()[0]["latency"], 0.05)
+
+    def test_closed_stream_releases_the_proxy(self):
+        slow, _ = self._proxy(name="slow", body_delay=0.05)
+        pool = LMDOIT_Proxy_Pool(proxies=[slow], max_concurrency_per_proxy=1)
+
+        response = pool.request(method="GET", url="http://target/", stream=True)
+        self.assertEqual(pool.stats()[0]["in_flight"], 1)
+        response.close()
+        self.assertEqual(pool.stats()[0]["in_flight"], 0)
+
+    def test_latency(self):
+        fast, fast_state = self._proxy(name="fast")
+        slow, slow_state = self._proxy(name="slow", delay=0.1)
+        pool = LMDOIT_Proxy_Pool(proxies=[slow, fast])
+
+        for _ in range(10):
+            pool.request(method="GET", url="http://target/")
+
+        self.assertEqual(slow_state["requests"], 1)
+        self.assertEqual(fast_state["requests"], 9)
+
+    def test_ejection_and_retry(self):
+        good, good_state = self._proxy(name="good")
+        dead = _dead_proxy()
+        pool = LMDOIT_Proxy_Pool(proxies=[dead, good], max_failures=1)
+
+        for _ in range(5):
+            response = pool.request(method="GET", url="http://target/")
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(good_state["requests"], 5)
+        stats = {s["url"]: s for s in pool.stats()}
+        self.assertTrue(stats[dead]["ejected"])
+        self.assertEqual(stats[dead]["requests"], 1)
+        self.assertLess(stats[dead]["health"], stats[good]["health"])
+
+    def test_trial_after_ejection(self):
+        flaky, flaky_state = self._proxy(name="flaky")
+        pool = LMDOIT_Proxy_Pool(proxies=[flaky], max_failures=2, ejection_seconds=0.1)
+
+        flaky_state["failing"] = True
+        for _ in range(2):
+            self.assertEqual(pool.request(method="GET", url="http://target/").status_code, 502)
+        self.assertTrue(pool.stats()[0]["ejected"])
+
+        # The only proxy is ejected, the request waits for its trial.
+        flaky_state["failing"] = False
+        started = time.monotonic()
+        self.assertEqual(pool.request(method="GET", url="http://target/").status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertFalse(pool.stats()[0]["ejected"])
+
+    def test_probe(self):
+        flaky, flaky_state = self._proxy(name="flaky")
+        pool = LMDOIT_Proxy_Pool(proxies=[flaky], max_failures=1, ejection_seconds=0.05)
+
+        flaky_state["failing"] = True
+        pool.request(method="GET", url="http://target/")
+        self.assertEqual(pool.probe(url="http://target/"), 0)
+
+        time.sleep(0.1)
+        self.assertEqual(pool.probe(url="http://target/"), 0)
+        self.assertTrue(pool.stats()[0]["ejected"])
+
+        time.sleep(0.1)
+        flaky_state["failing"] = False
+        self.assertEqual(pool.probe(url="http://target/"), 1)
+        self.assertFalse(pool.stats()[0]["ejected"])
+
+    def test_acquire_timeout(self):
+        a, _ = self._proxy(name="a")
+        pool = LMDOIT_Proxy_Pool(proxies=[a], max_concurrency_per_proxy=1)
+
+        proxy = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.05)
+        pool.release(proxy=proxy, ok=True)
+        pool.release(proxy=pool.acquire(timeout=0.05), ok=True)
+
+
+class TestLMDOITProxyPool(unittest.TestCase):
+    def setUp(self):
+        self._servers = []
+        self._urls = []
+        for name in ["a", "b"]:
+            server, url, _ = _proxy_server(name=name)
+            self._servers.append(server)
+            self._urls.append(url)
+
+    def tearDown(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_cookie_jars(self):
+        pool = LMDOIT_Proxy_Pool(proxies=self._urls, max_concurrency_per_proxy=1)
+        api = LMDOIT(proxy_pool=pool)
+
+        bodies = []
+        for _ in range(4):
+            request = api.auth(url="http://target/login", method="GET").cookie(
+                "session=secret"
+            )
+            bodies.append(request._send().text)
+
+        # The authentication cookies go through every proxy, the cookies set
+        # by responses stay with the proxy which received them.
+        self.assertTrue(all(["session=secret" in body for body in bodies]))
+        self.assertFalse(any(["via=b" in body for body in bodies if body[0] == "a"]))
+        self.assertFalse(any(["via=a" in body for body in bodies if body[0] == "b"]))
+        self.assertListEqual(
+            [proxy.cookies.get("via") for proxy in pool._proxies], ["a", "b"]
+        )
+        self.assertNotIn("via", api._session.cookies)
+
+    def test_shared_cookie_jar_across_threads(self):
+        pool = LMDOIT_Proxy_Pool(proxies=self._urls[:1])
+        pool.request(method="GET", url="http://target/")
+
+        bodies = []
+        thread = threading.Thread(
+            target=lambda: bodies.append(pool.request(method="GET", url="http://target/").text)
+        )
+        thread.start()
+        thread.join()
+
+        self.assertIn("via=a", bodies[0])
+
+    def test_connections_are_not_tracked(self):
+        api = LMDOIT(proxy_pool=LMDOIT_Proxy_Pool(proxies=self._urls))
+
+        with self.assertRaises(ValueError):
+            api.prewarm(hosts=["www.site.com"])
+        with self.assertRaises(ValueError):
+            api.connection_stats()
+
+
+if __name__ == "__main__":
+    unittest.main()
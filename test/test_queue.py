@@ -0,0 +1,205 @@
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestQueueLeases(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_claim_is_exclusive(self):
+        with LMDOIT_Queue(path=self._path) as queue, LMDOIT_Queue(
+            path=self._path
+        ) as other:
+            queue.put_many(jobs=[{"url": f"https://www.site.com/{i}"} for i in range(5)])
+
+            first = queue.claim(worker_id="a", batch_size=3)
+            second = other.claim(worker_id="b", batch_size=3)
+
+            self.assertEqual(len(first), 3)
+            self.assertEqual(len(second), 2)
+            self.assertFalse({j["id"] for j in first} & {j["id"] for j in second})
+            self.assertDictEqual(
+                queue.stats(), {"pending": 0, "leased": 5, "done": 0, "dead": 0}
+            )
+
+    def test_expired_lease_is_reclaimed(self):
+        with LMDOIT_Queue(path=self._path, visibility_timeout=0.1) as queue:
+            job_id = queue.put(job={"url": "https://www.site.com"})
+            self.assertEqual(queue.claim(worker_id="crashed")[0]["id"], job_id)
+            self.assertListEqual(queue.claim(worker_id="b"), [])
+
+            time.sleep(0.15)
+            reclaimed = queue.claim(worker_id="b")
+
+            self.assertEqual(reclaimed[0]["attempts"], 2)
+            self.assertFalse(queue.complete(job_id=job_id, worker_id="crashed", result={}))
+            self.assertTrue(queue.complete(job_id=job_id, worker_id="b", result={"ok": True}))
+            self.assertListEqual(list(queue.results()), [{"ok": True, "id": job_id}])
+
+    def test_dead_letters(self):
+        with LMDOIT_Queue(path=self._path, max_attempts=2, visibility_timeout=0.1) as queue:
+            failing = queue.put(job={"url": "https://www.site.com/failing"})
+            for _ in range(2):
+                job = queue.claim(worker_id="a")[0]
+                self.assertTrue(queue.fail(job_id=job["id"], worker_id="a", error="boom"))
+
+            crashing = queue.put(job={"url": "https://www.site.com/crashing"})
+            for _ in range(2):
+                queue.claim(worker_id="a")
+                time.sleep(0.15)
+            self.assertListEqual(queue.claim(worker_id="a"), [])
+
+            dead = list(queue.dead_letters())
+            self.assertListEqual([j["id"] for j in dead], [failing, crashing])
+            self.assertEqual(dead[0]["last_error"], "boom")
+            self.assertEqual(dead[1]["attempts"], 2)
+            self.assertDictEqual(
+                queue.stats(), {"pending": 0, "leased": 0, "done": 0, "dead": 2}
+            )
+
+    def test_exhausted_jobs_do_not_fill_the_batch(self):
+        with LMDOIT_Queue(path=self._path, max_attempts=1, visibility_timeout=0.1) as queue:
+            crashing = queue.put(job={"url": "https://www.site.com/crashing"})
+            queue.claim(worker_id="crashed", batch_size=1)
+            time.sleep(0.15)
+            queue.put_many(jobs=[{"url": f"https://www.site.com/{i}"} for i in range(2)])
+
+            self.assertEqual(len(queue.claim(worker_id="a", batch_size=1)), 1)
+            self.assertListEqual([j["id"] for j in queue.dead_letters()], [crashing])
+            self.assertEqual(queue.stats()["pending"], 1)
+
+    def test_put_request(self):
+        with LMDOIT_Queue(path=self._path) as queue:
+            request = (
+                LMDOIT()
+                .auth(url="https://www.site.com", method="POST")
+                .cookie(cookie="username=bob")
+                .set_url_param(key="page", value=2)
+            )
+            queue.put(job=request, output_dest="page.html")
+
+            job = queue.claim(worker_id="a")[0]
+            self.assertEqual(job["url"], "https://www.site.com")
+            self.assertEqual(job["method"], "POST")
+            self.assertDictEqual(job["params"], {"page": 2})
+            self.assertDictEqual(job["headers"], {"Cookie": "username=bob"})
+            self.assertEqual(job["output"], "page.html")
+
+
+class TestQueueWorkers(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._dir.cleanup()
+
+    def test_many_workers(self):
+        with LMDOIT_Queue(path=self._path, max_attempts=2) as queue:
+            queue.put_many(
+                jobs=[
+                    {"url": f"{self._url}/{i}", "extract": {"regex": r"\d+"}}
+                    for i in range(40)
+                ]
+                + [{"url": f"{self._url}/missing"}]
+            )
+
+        def work():
+            with LMDOIT_Queue(path=self._path, max_attempts=2) as queue:
+                queue.work(batch=LMDOIT_Batch(concurrency=2), batch_size=4)
+
+        workers = [threading.Thread(target=work) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with LMDOIT_Queue(path=self._path) as queue:
+            results = list(queue.results())
+
+            self.assertDictEqual(
+                queue.stats(), {"pending": 0, "leased": 0, "done": 40, "dead": 1}
+            )
+            self.assertListEqual(
+                sorted([int(r["extracted"]["regex"][0]) for r in results]),
+                list(range(40)),
+            )
+            self.assertTrue(
+                next(queue.dead_letters())["last_error"].startswith("HTTPError")
+            )
+
+    def test_leases_of_running_jobs_are_extended(self):
+        with LMDOIT_Queue(path=self._path, visibility_timeout=0.2) as queue:
+            queue.put(job={"url": f"{self._url}/slow"})
+
+            claimed = []
+
+            def steal():
+                time.sleep(0.35)
+                with LMDOIT_Queue(path=self._path, visibility_timeout=0.2) as other:
+                    claimed.extend(other.claim(worker_id="other"))
+
+            thief = threading.Thread(target=steal)
+            thief.start()
+            summary = queue.work(worker_id="a")
+            thief.join()
+
+            self.assertListEqual(claimed, [])
+            self.assertDictEqual(summary, {"succeeded": 1, "failed": 0, "lost": 0})
+            self.assertEqual(queue.stats()["done"], 1)
+
+    def test_extend_owned_leases_only(self):
+        with LMDOIT_Queue(path=self._path) as queue:
+            job_id = queue.put(job={"url": "https://www.site.com"})
+            queue.claim(worker_id="a")
+
+            self.assertEqual(queue.extend(job_ids=[job_id], worker_id="b"), 0)
+            self.assertEqual(queue.extend(job_ids=[job_id], worker_id="a"), 1)
+
+    def test_sessions_are_reused(self):
+        with LMDOIT_Queue(path=self._path) as queue:
+            queue.put_many(jobs=[{"url": f"{self._url}/{i}"} for i in range(100)])
+
+            batch = LMDOIT_Batch(concurrency=4)
+            summary = queue.work(batch=batch, batch_size=10)
+
+            self.assertEqual(summary["succeeded"], 100)
+            self.assertLessEqual(batch._apis.qsize(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
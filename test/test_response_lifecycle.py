@@ -0,0 +1,125 @@
+import gc
+import sys
+import tracemalloc
+import unittest
+
+import requests
+
+sys.path.append("../")
+from lmdoit import *
+
+
+def make_response(i: int) -> LMDOIT_Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response._content = (
+        f"<html><body><h1>Title {i}</h1>"
+        f'<script>var data = {{"i": {i}}};</script></body></html>'
+    ).encode()
+    return LMDOIT_Response(session=None, response=response)
+
+
+class TestRelease(unittest.TestCase):
+    def test_release(self):
+        response = make_response(0)
+        self.assertEqual(response.find_html_element(css_selector="h1").text, "Title 0")
+
+        response.release()
+
+        with self.assertRaises(ValueError):
+            response.match_regex(regex="Title")
+        with self.assertRaises(ValueError):
+            response.find_all_script_elements()
+
+    def test_find_html_element(self):
+        response = make_response(0)
+        response._response._content = b"<h1>a</h1><h1>b</h1>"
+
+        self.assertEqual(response.find_html_element(css_selector="h1").text, "a")
+        self.assertListEqual(
+            [
+                tag.text
+                for tag in response.find_html_element(
+                    css_selector="h1", return_all_found=True
+                )
+            ],
+            ["a", "b"],
+        )
+        self.assertIsNone(response.find_html_element(css_selector="h2"))
+
+    def test_context_manager(self):
+        with make_response(0) as response:
+            self.assertEqual(response.match_regex(regex=r"Title (\d+)"), ["0"])
+
+        with self.assertRaises(ValueError):
+            response.to_json()
+
+    def test_slots(self):
+        self.assertFalse(hasattr(make_response(0), "__dict__"))
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def setUp(self):
+        self._default_budget = LMDOIT_Response.memory_budget
+        LMDOIT_Response.memory_budget = LMDOIT_Memory_Budget(max_bytes=20000)
+
+    def tearDown(self):
+        LMDOIT_Response.memory_budget = self._default_budget
+
+    def test_eviction(self):
+        responses = [make_response(i) for i in range(1000)]
+        for response in responses:
+            response.find_all_script_elements()
+
+        budget = LMDOIT_Response.memory_budget
+        self.assertLessEqual(budget.used_bytes, budget.max_bytes)
+        self.assertEqual(
+            len(budget), len([r for r in responses if r._soup is not None])
+        )
+        self.assertLess(len(budget), 100)
+
+        # An evicted tree is rebuilt on its next use.
+        self.assertIsNone(responses[0]._soup)
+        self.assertEqual(
+            responses[0].find_html_element(css_selector="h1").text, "Title 0"
+        )
+
+    def test_forget_collected(self):
+        make_response(0).find_all_script_elements()
+        gc.collect()
+
+        self.assertEqual(len(LMDOIT_Response.memory_budget), 0)
+        self.assertEqual(LMDOIT_Response.memory_budget.used_bytes, 0)
+
+    def test_shrink(self):
+        responses = [make_response(i) for i in range(10)]
+        for response in responses:
+            response.find_all_script_elements()
+
+        LMDOIT_Response.memory_budget.set_max_bytes(max_bytes=0)
+
+        self.assertTrue(all([r._soup is None for r in responses]))
+
+
+class TestFlatMemory(unittest.TestCase):
+    def test_released_responses(self):
+        tracemalloc.start()
+        try:
+            for i in range(2000):
+                with make_response(i) as response:
+                    response.find_html_element(css_selector="h1")
+                    list(response.find_json_objects_from_script_elements())
+                if i == 500:
+                    gc.collect()
+                    warm, _ = tracemalloc.get_traced_memory()
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(current - warm, 256 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import http.server
+import sys
+import threading
+import unittest
+
+import requests
+
+sys.path.append("../")
+from lmdoit import *
+from lmdoit.Script import iter_json_objects, iter_scripts
+
+
+PAGE = """<html><head>
+<script src="/static/app.js"></script>
+<script type="application/json">{"config": {"lang": "fr"}}</script>
+</head><body>
+<script>var a = {"items": [1, 2, 3]}; var b = [4, "</div>"];</script>
+<script async>window.x = {"nested": {"ok": true}};</script>
+</body></html>"""
+
+FIRST_PART = b'<html><body><script>var a = {"first": 1};</script>'
+SECOND_PART = b'<script>var b = {"second": 2};</script></body></html>'
+
+
+def make_response(text: str) -> LMDOIT_Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response._content = text.encode()
+    return LMDOIT_Response(session=None, response=response)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    second_part_allowed = threading.Event()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(FIRST_PART)
+        self.wfile.flush()
+        if _Handler.second_part_allowed.wait(timeout=5):
+            self.wfile.write(SECOND_PART)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestScriptParser(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        for size in [1, 2, 7, 64, len(PAGE)]:
+            chunks = [PAGE[i : i + size] for i in range(0, len(PAGE), size)]
+            scripts = list(iter_scripts(chunks=chunks))
+
+            self.assertEqual(len(scripts), 4)
+            self.assertDictEqual(scripts[0][0], {"src": "/static/app.js"})
+            self.assertDictEqual(scripts[3][0], {"async": ""})
+            self.assertEqual(
+                scripts[2][1], 'var a = {"items": [1, 2, 3]}; var b = [4, "</div>"];'
+            )
+
+    def test_same_as_soup(self):
+        response = make_response(PAGE)
+        streamed = list(response.find_json_objects_from_script_elements())
+
+        response.find_all_script_elements()
+        self.assertIsNotNone(response._soup)
+        self.assertListEqual(
+            list(response.find_json_objects_from_script_elements()), streamed
+        )
+        self.assertListEqual(
+            streamed,
+            [
+                {"config": {"lang": "fr"}},
+                {"items": [1, 2, 3]},
+                [4, "</div>"],
+                {"nested": {"ok": True}},
+            ],
+        )
+
+    def test_application_json_only(self):
+        response = make_response(PAGE)
+
+        self.assertListEqual(
+            list(response.find_json_objects_from_script_elements(True)),
+            [{"config": {"lang": "fr"}}],
+        )
+        self.assertIsNone(response._soup)
+
+    def test_iter_json_objects(self):
+        self.assertListEqual(
+            list(iter_json_objects(scripts=[({}, "var a = {broken: 1}, b = [1];")])),
+            [[1]],
+        )
+
+
+class TestStreamJSONObjects(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        _Handler.second_part_allowed.clear()
+
+    def tearDown(self):
+        _Handler.second_part_allowed.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_yield_while_downloading(self):
+        objects = LMDOIT().no_auth(
+            url=self._url, method="GET"
+        ).stream_json_objects_from_script_elements()
+
+        # The server only sends the rest of the page once the first object
+        # has been received.
+        self.assertDictEqual(next(objects), {"first": 1})
+        _Handler.second_part_allowed.set()
+        self.assertListEqual(list(objects), [{"second": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
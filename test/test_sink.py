@@ -0,0 +1,150 @@
+import csv
+import gc
+import importlib.util
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+import warnings
+
+sys.path.append("../")
+from lmdoit import *
+
+
+def records(count: int):
+    for i in range(count):
+        yield {"id": i, "name": f"video {i}", "formats": [{"width": 1920}]}
+
+
+class TestJSONLSink(unittest.TestCase):
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as root:
+            output_dest = pathlib.Path(root, "formats.jsonl")
+            with LMDOIT_JSONL_Sink(output_dest=output_dest, batch_size=7) as sink:
+                sink.write_many(records=records(100))
+
+                # Nothing is visible before the file is complete.
+                sink.flush()
+                self.assertFalse(output_dest.exists())
+
+            self.assertListEqual(
+                list(map(json.loads, output_dest.read_text().splitlines())),
+                list(records(100)),
+            )
+            self.assertListEqual(os.listdir(root), ["formats.jsonl"])
+
+    def test_rotation(self):
+        with tempfile.TemporaryDirectory() as root:
+            output_dest = pathlib.Path(root, "formats.jsonl")
+            with LMDOIT_JSONL_Sink(
+                output_dest=output_dest, batch_size=10, max_file_bytes=2048
+            ) as sink:
+                sink.write_many(records=records(200))
+
+            self.assertGreater(len(sink.written_paths), 1)
+            self.assertListEqual(
+                sorted(os.listdir(root)), [p.name for p in sink.written_paths]
+            )
+            self.assertEqual(sink.written_paths[0].name, "formats-00000.jsonl")
+            self.assertListEqual(
+                [
+                    json.loads(line)
+                    for path in sink.written_paths
+                    for line in path.read_text().splitlines()
+                ],
+                list(records(200)),
+            )
+
+    def test_failed_batch(self):
+        with tempfile.TemporaryDirectory() as root:
+            output_dest = pathlib.Path(root, "formats.jsonl")
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                sink = LMDOIT_JSONL_Sink(output_dest=output_dest, batch_size=2)
+                sink.write_many(records=records(2))
+                sink.write_many(records=[{"id": 2}, {"id": object()}])
+
+                with self.assertRaises(TypeError):
+                    sink.flush()
+                with self.assertRaises(TypeError):
+                    sink.close()
+
+                del sink
+                gc.collect()
+
+            # The `.partial` file is kept, and closed.
+            self.assertListEqual([str(w.message) for w in caught], [])
+            partial = pathlib.Path(f"{output_dest}.partial")
+            self.assertEqual(len(partial.read_text().splitlines()), 2)
+
+    def test_abstract(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaises(TypeError):
+                LMDOIT_Sink(output_dest=os.path.join(root, "a.jsonl"))
+
+    def test_closed(self):
+        with tempfile.TemporaryDirectory() as root:
+            sink = LMDOIT_JSONL_Sink(output_dest=os.path.join(root, "a.jsonl"))
+            sink.close()
+
+            with self.assertRaises(ValueError):
+                sink.write(record={"id": 0})
+
+
+class TestCSVSink(unittest.TestCase):
+    def test_header_per_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            with LMDOIT_CSV_Sink(
+                output_dest=os.path.join(root, "formats.csv"),
+                batch_size=10,
+                max_file_bytes=1024,
+            ) as sink:
+                sink.write_many(records=records(100))
+
+            rows = []
+            for path in sink.written_paths:
+                with open(path, newline="") as stream:
+                    rows.extend(csv.DictReader(stream))
+
+            self.assertEqual(len(rows), 100)
+            self.assertDictEqual(
+                rows[42],
+                {"id": "42", "name": "video 42", "formats": '[{"width": 1920}]'},
+            )
+
+    def test_unknown_keys(self):
+        with tempfile.TemporaryDirectory() as root:
+            output_dest = os.path.join(root, "formats.csv")
+            with LMDOIT_CSV_Sink(output_dest=output_dest) as sink:
+                sink.write(record={"id": 0, "name": "video 0"})
+                sink.write(record={"id": 1})
+                with self.assertRaises(ValueError):
+                    sink.write(record={"id": 2, "duration": 60})
+
+            with open(output_dest, newline="") as stream:
+                self.assertListEqual(
+                    list(csv.DictReader(stream)),
+                    [{"id": "0", "name": "video 0"}, {"id": "1", "name": ""}],
+                )
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "'pyarrow' is not installed.")
+class TestParquetSink(unittest.TestCase):
+    def test_write(self):
+        import pyarrow.parquet
+
+        with tempfile.TemporaryDirectory() as root:
+            output_dest = os.path.join(root, "formats.parquet")
+            with LMDOIT_Parquet_Sink(output_dest=output_dest, batch_size=10) as sink:
+                sink.write_many(records=records(100))
+
+            self.assertListEqual(
+                pyarrow.parquet.read_table(output_dest).to_pylist(),
+                list(records(100)),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
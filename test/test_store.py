@@ -0,0 +1,159 @@
+import http.server
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append("../")
+from lmdoit import *
+
+
+BODY = b"<html><body>the same content under many URLs</body></html>"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    hits = {"GET": 0, "HEAD": 0}
+
+    def _send_headers(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+
+    def do_HEAD(self):
+        _Handler.hits["HEAD"] += 1
+        self._send_headers()
+
+    def do_GET(self):
+        _Handler.hits["GET"] += 1
+        self._send_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestStorePut(unittest.TestCase):
+    def test_dedup(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            first = store.put(chunks=[BODY[:10], BODY[10:]])
+            second = store.put(chunks=[BODY])
+
+            self.assertEqual(first, second)
+            self.assertTrue(store.has(digest=first))
+            self.assertEqual(store.path_of(digest=first).read_bytes(), BODY)
+            self.assertEqual(
+                len([p for p in pathlib.Path(root, "objects").rglob("*") if p.is_file()]),
+                1,
+            )
+
+    def test_link(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            digest = store.put(chunks=[BODY])
+
+            a = store.link(digest=digest, output_dest=pathlib.Path(root, "out", "a.html"))
+            b = store.link(digest=digest, output_dest=os.path.join(root, "out", "b.html"))
+
+            self.assertEqual(a.read_bytes(), BODY)
+            self.assertTrue(os.path.samefile(a, b))
+
+    def test_unknown_digest(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+
+            with self.assertRaises(ValueError):
+                store.link(digest="00" * 32, output_dest=os.path.join(root, "a"))
+
+    def test_index_is_persisted(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            digest = store.put(chunks=[BODY])
+            store.record(url="https://www.site.com/a", digest=digest, etag='"v1"')
+
+            self.assertDictEqual(
+                LMDOIT_Store(root=root).lookup(url="https://www.site.com/a"),
+                {"digest": digest, "etag": '"v1"', "last_modified": None},
+            )
+            self.assertIsNone(store.lookup(url="https://www.site.com/b"))
+
+    def test_index_is_shared(self):
+        with tempfile.TemporaryDirectory() as root:
+            first = LMDOIT_Store(root=root)
+            second = LMDOIT_Store(root=root)
+            digest = first.put(chunks=[BODY])
+
+            # Neither instance overwrites the entries of the other one.
+            first.record(url="https://www.site.com/a", digest=digest)
+            second.record(url="https://www.site.com/b", digest=digest)
+
+            for store in [first, second, LMDOIT_Store(root=root)]:
+                self.assertIsNotNone(store.lookup(url="https://www.site.com/a"))
+                self.assertIsNotNone(store.lookup(url="https://www.site.com/b"))
+
+
+class TestStoreDownload(unittest.TestCase):
+    def setUp(self):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        _Handler.hits.update({"GET": 0, "HEAD": 0})
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_skip_known_content(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            lmdoit_api = LMDOIT()
+
+            downloaded = lmdoit_api.no_auth(
+                url=f"{self._url}/media", method="GET"
+            ).download_to_store(store=store, output_dest=os.path.join(root, "a"))
+            skipped = lmdoit_api.no_auth(
+                url=f"{self._url}/media", method="GET"
+            ).download_to_store(store=store, output_dest=os.path.join(root, "b"))
+
+            self.assertTrue(downloaded)
+            self.assertFalse(skipped)
+            self.assertDictEqual(_Handler.hits, {"GET": 1, "HEAD": 1})
+            self.assertEqual(pathlib.Path(root, "b").read_bytes(), BODY)
+
+    def test_save_response_to_store(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            lmdoit_api = LMDOIT()
+
+            for name in ["a", "b"]:
+                lmdoit_api.no_auth(
+                    url=f"{self._url}/{name}", method="GET"
+                ).get_response().save_response_to_store(
+                    store=store, output_dest=os.path.join(root, name)
+                )
+
+            self.assertTrue(
+                os.path.samefile(os.path.join(root, "a"), os.path.join(root, "b"))
+            )
+            self.assertIsNotNone(store.lookup(url=f"{self._url}/a"))
+
+    def test_download_over_linked_destination(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = LMDOIT_Store(root=root)
+            digest = store.put(chunks=[b"another body"])
+            output_dest = store.link(digest=digest, output_dest=os.path.join(root, "a"))
+
+            LMDOIT().no_auth(url=f"{self._url}/media", method="GET").download(
+                output_dest=output_dest
+            )
+
+            self.assertEqual(output_dest.read_bytes(), BODY)
+            self.assertEqual(store.path_of(digest=digest).read_bytes(), b"another body")
+
+
+if __name__ == "__main__":
+    unittest.main()